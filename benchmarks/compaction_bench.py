@@ -0,0 +1,82 @@
+"""Estimate per-step prefill tokens of a research loop with and without compaction.
+
+Simulates an agent issuing `--steps` searches of 5 results each, with a share
+of results repeated across searches, and prints the estimated number of tokens
+re-sent to the model at every step.
+
+    python benchmarks/compaction_bench.py --steps 30 --threshold 12000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compaction import compact_results, estimate_tokens, plan_compaction  # noqa: E402
+
+# System prompt plus tool schemas of a research agent, as measured by the compaction middleware
+SYSTEM_PROMPT_TOKENS = 4700
+WORDS = "model agent research graph data market growth study report analysis system users policy".split()
+
+
+def fake_results(rng, pool, count=5, repeat_share=0.3):
+    results = []
+    for _ in range(count):
+        if pool and rng.random() < repeat_share:
+            results.append(rng.choice(pool))
+            continue
+        n = len(pool)
+        result = {
+            "title": f"Result {n}: " + " ".join(rng.choices(WORDS, k=6)),
+            "href": f"https://example.com/article-{n}",
+            "body": " ".join(rng.choices(WORDS, k=rng.randint(80, 160))),
+        }
+        pool.append(result)
+        results.append(result)
+    return results
+
+
+def simulate(steps, threshold, mode, seed=0):
+    rng = random.Random(seed)
+    pool, seen, messages, per_step = [], set(), [], []
+    for step in range(steps):
+        per_step_before = SYSTEM_PROMPT_TOKENS + sum(estimate_tokens(m.content) for m in messages)
+        if mode == "compacted":
+            replacements, _, _, _ = plan_compaction(messages, threshold, base_tokens=SYSTEM_PROMPT_TOKENS)
+            for i, summary in replacements.items():
+                messages[i].content = summary
+        per_step.append((per_step_before, SYSTEM_PROMPT_TOKENS + sum(estimate_tokens(m.content) for m in messages)))
+
+        results = fake_results(rng, pool)
+        messages.append(SimpleNamespace(type="ai", content=f"Searching step {step}", tool_call_id=None))
+        if mode == "raw":
+            content = str(results)
+        else:
+            content = json.dumps(compact_results(results, seen), ensure_ascii=False)
+        messages.append(SimpleNamespace(type="tool", content=content, tool_call_id=f"call_{step}"))
+    return per_step
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=30)
+    parser.add_argument("--threshold", type=int, default=12000)
+    args = parser.parse_args()
+
+    raw = simulate(args.steps, args.threshold, "raw")
+    trimmed = simulate(args.steps, args.threshold, "trimmed")
+    compacted = simulate(args.steps, args.threshold, "compacted")
+
+    print(f"{'step':>4} {'raw':>8} {'trimmed':>8} {'compacted':>10}")
+    for step, (r, t, c) in enumerate(zip(raw, trimmed, compacted), 1):
+        print(f"{step:>4} {r[1]:>8} {t[1]:>8} {c[1]:>10}")
+    totals = [sum(after for _, after in run) for run in (raw, trimmed, compacted)]
+    print(f"{'sum':>4} {totals[0]:>8} {totals[1]:>8} {totals[2]:>10}")
+    print(f"prefill saved vs raw: trimmed {1 - totals[1] / totals[0]:.0%}, compacted {1 - totals[2] / totals[0]:.0%}")
+
+
+if __name__ == "__main__":
+    main()
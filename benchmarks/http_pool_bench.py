@@ -0,0 +1,118 @@
+"""Measure per-request latency with a new connection per call vs pooled keep-alive connections.
+
+Starts a local HTTP/1.1 stub that answers with an LLM-sized JSON body, then
+sends `--requests` requests from `--threads` threads, either opening a fresh
+connection for each request (what `with DDGS()` per search or a client per
+run does) or reusing connections from `clients.ClientPool`. `--handshake-ms`
+delays each new connection on the server to stand in for the TCP/TLS round
+trips to a real provider; set it to 0 to see the bare local cost.
+
+    python benchmarks/http_pool_bench.py --threads 4 --requests 400 --handshake-ms 30
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clients import ClientPool  # noqa: E402
+from routing import percentile  # noqa: E402
+
+BODY = json.dumps({"choices": [{"message": {"content": "research findings " * 120}}]}).encode()
+
+
+def make_handler(handshake: float):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep connections open between requests
+
+        def setup(self):
+            time.sleep(handshake)
+            # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            super().setup()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        def log_message(self, *args):
+            pass
+
+    return StubHandler
+
+
+def post(conn: http.client.HTTPConnection) -> None:
+    conn.request("POST", "/v1/chat/completions", body=b'{"messages": []}',
+                 headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    response.read()
+    if response.status != 200:
+        raise RuntimeError(f"stub answered {response.status}")
+
+
+def run(address, threads, requests, pooled):
+    host, port = address
+    pool = ClientPool(lambda: http.client.HTTPConnection(host, port, timeout=10), threads)
+
+    def one(_):
+        start = time.perf_counter()
+        if pooled:
+            with pool.acquire() as conn:
+                post(conn)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            try:
+                post(conn)
+            finally:
+                conn.close()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(one, range(requests)))
+    wall = time.perf_counter() - start
+    pool.close()
+    return latencies, wall, pool.created if pooled else requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=4, help="concurrent clients, like agents in a run")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--handshake-ms", type=float, default=30.0,
+                        help="server-side delay per new connection, standing in for TCP/TLS setup")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.handshake_ms / 1000))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"threads={args.threads} requests={args.requests} handshake={args.handshake_ms:g} ms")
+    print(f"{'mode':<16}{'connections':>12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}")
+    results = {}
+    for label, pooled in (("new per call", False), ("pooled", True)):
+        latencies, wall, connections = run(server.server_address, args.threads, args.requests, pooled)
+        results[label] = statistics.mean(latencies)
+        print(
+            f"{label:<16}{connections:>12}{results[label] * 1000:>10.2f}"
+            f"{percentile(latencies, 50) * 1000:>10.2f}{percentile(latencies, 95) * 1000:>10.2f}"
+            f"{args.requests / wall:>10.0f}"
+        )
+    print(f"saved per call: {(results['new per call'] - results['pooled']) * 1000:.2f} ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Concurrent-user load test for the research pipeline, using local fake backends.
+
+Every LLM provider, DDGS search and deep agent is replaced by the fakes in
+`fakes.py`, with log-normal latencies around the given medians, so the test
+measures the app's own scaling: thread pools, routing, hedging, compaction
+and memory. Each simulated user runs `--runs` research requests back to back.
+
+    python benchmarks/load_test.py --users 10 --runs 3
+    python benchmarks/load_test.py --users 5 --apptest   # drive app.py through Streamlit's AppTest
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from routing import percentile  # noqa: E402
+
+QUERIES = [
+    "What is LangGraph?",
+    "Compare LangGraph, CrewAI and AutoGen for multi-agent orchestration",
+    "Survey the global EV battery market: key players, pricing trends, and supply chain risks",
+    "How does retrieval augmented generation work?",
+    "State of small modular nuclear reactors: costs, regulation and deployment timelines",
+]
+
+
+def rss_bytes():
+    """Current resident set size, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class ResourceSampler(threading.Thread):
+    """Samples thread count and RSS in the background while the test runs."""
+
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.threads = []
+        self.rss = []
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.threads.append(threading.active_count())
+            rss = rss_bytes()
+            if rss is not None:
+                self.rss.append(rss)
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def configure_environment(args):
+    """Point the app's settings at fake models before config is first loaded."""
+    os.environ.update({
+        "Research_models": "fake:research,fake:research-backup",
+        "Report_models": "fake:writer,fake:writer-backup",
+        "Max_agents": str(args.max_agents),
+        "Hedging": "1" if args.hedge else "0",
+        # Until percentiles are available, hedge LLM requests at three times their median latency
+        "Hedge_after": str(args.llm_latency * 3),
+        "History_db": os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "history.db"),
+    })
+
+
+def install_fakes(args):
+    from fakes import install_fake_backends
+
+    research = dict(latency=args.llm_latency, jitter=args.llm_jitter, error_rate=args.llm_error_rate)
+    report = dict(research, reply="# Report\n\n## Executive Summary\n\n" + "Generated findings. " * 400)
+    steps = tuple(int(x) for x in args.steps.split("-"))
+    install_fake_backends(
+        profiles={
+            "research": dict(research, reply="Agent findings. " * 300),
+            "research-backup": dict(research, reply="Agent findings. " * 300),
+            "writer": report,
+            "writer-backup": report,
+        },
+        search_latency=args.search_latency,
+        search_jitter=args.search_jitter,
+        steps=(steps[0], steps[-1]),
+        seed=args.seed,
+    )
+
+
+def pipeline_user(args, router, user, latencies, errors):
+    from research import run_pipeline
+
+    rng = random.Random(args.seed + user)
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        try:
+            run_pipeline(rng.choice(QUERIES), router)
+            latencies.append(time.perf_counter() - start)
+        except Exception as error:
+            errors.append(repr(error))
+        time.sleep(args.think)
+
+
+def apptest_user(args, router, user, latencies, errors):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(args.seed + user)
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=args.timeout)
+    at.run()
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        try:
+            query_input = next(t for t in at.text_input if t.label != "Search past reports")
+            query_input.input(rng.choice(QUERIES))
+            next(b for b in at.button if b.label == "Run Research").click()
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+            latencies.append(time.perf_counter() - start)
+        except Exception as error:
+            errors.append(repr(error))
+        time.sleep(args.think)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10, help="concurrent simulated users")
+    parser.add_argument("--runs", type=int, default=3, help="research requests per user")
+    parser.add_argument("--think", type=float, default=0.0, help="seconds between a user's requests")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="median fake LLM latency (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.5, help="log-normal sigma of LLM latency")
+    parser.add_argument("--llm-error-rate", type=float, default=0.02)
+    parser.add_argument("--search-latency", type=float, default=0.4, help="median fake DDGS latency (s)")
+    parser.add_argument("--search-jitter", type=float, default=0.6)
+    parser.add_argument("--steps", default="3-8", help="search steps per agent, e.g. 3-8")
+    parser.add_argument("--max-agents", type=int, default=4)
+    parser.add_argument("--hedge", action="store_true", help="enable hedged requests")
+    parser.add_argument("--apptest", action="store_true", help="drive app.py through Streamlit AppTest")
+    parser.add_argument("--timeout", type=float, default=300, help="AppTest script timeout (s)")
+    parser.add_argument("--sample-interval", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    configure_environment(args)
+    install_fakes(args)
+
+    from config import load_config
+    from routing import ModelRouter, parse_cascade
+
+    config = load_config()
+    router = ModelRouter(
+        {
+            "research": parse_cascade(config.research_models, {}),
+            "report": parse_cascade(config.report_models, {}),
+        },
+        hedge=config.hedging,
+        hedge_after=config.hedge_after,
+        hedge_percentile=config.hedge_percentile,
+    )
+    user_fn = apptest_user if args.apptest else pipeline_user
+
+    latencies, errors = [], []
+    sampler = ResourceSampler(args.sample_interval)
+    baseline_threads, baseline_rss = threading.active_count(), rss_bytes()
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        users = [executor.submit(user_fn, args, router, user, latencies, errors) for user in range(args.users)]
+        for future in users:
+            future.result()
+    wall = time.perf_counter() - start
+    sampler.stop()
+
+    mode = "streamlit apptest" if args.apptest else "pipeline"
+    print(f"mode={mode} users={args.users} runs/user={args.runs} hedging={config.hedging}")
+    print(f"completed runs     {len(latencies)} ({len(errors)} failed)")
+    print(f"wall time          {wall:.1f} s")
+    print(f"throughput         {len(latencies) / wall:.2f} runs/s")
+    for pct in (50, 90, 95, 99) if latencies else ():
+        print(f"latency p{pct:<3}       {percentile(latencies, pct):.2f} s")
+    print(f"threads            baseline {baseline_threads}, peak {max(sampler.threads, default=0)}")
+    if baseline_rss is not None and sampler.rss:
+        peak = max(sampler.rss)
+        print(f"memory (RSS)       baseline {baseline_rss / 2**20:.0f} MiB, peak {peak / 2**20:.0f} MiB, "
+              f"{(peak - baseline_rss) / 2**20 / args.users:.1f} MiB per user")
+    if args.hedge and not args.apptest:
+        print(f"hedging            {router.metrics.summary()}")
+    for error in sorted(set(errors))[:5]:
+        print(f"error: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measure memory retained per research session: full agent states vs findings records.
+
+Builds synthetic deep-agent final states (message history with raw search
+outputs, virtual files, todos) for `--sessions` concurrent sessions and
+reports the memory each approach keeps alive, measured with tracemalloc.
+
+    python benchmarks/memory_bench.py --sessions 20 --agents 3 --searches 15
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from findings import findings_record  # noqa: E402
+
+WORDS = "model agent research graph data market growth study report analysis system users policy".split()
+
+
+def fake_state(rng, searches):
+    messages = [SimpleNamespace(type="human", content="research question " * 5)]
+    files = {}
+    for step in range(searches):
+        messages.append(SimpleNamespace(type="ai", content="", tool_calls=[{"name": "internet_search"}]))
+        results = [
+            {
+                "title": " ".join(rng.choices(WORDS, k=8)),
+                "href": f"https://example.com/{step}-{i}-{rng.random()}",
+                "body": " ".join(rng.choices(WORDS, k=150)),
+            }
+            for i in range(5)
+        ]
+        messages.append(SimpleNamespace(type="tool", content=json.dumps(results)))
+        if step % 3 == 0:
+            files[f"/notes/{step}.md"] = {"content": [" ".join(rng.choices(WORDS, k=40))] * 20}
+    messages.append(SimpleNamespace(type="ai", content=" ".join(rng.choices(WORDS, k=1500))))
+    return {"messages": messages, "files": files, "todos": [{"content": "step", "status": "done"}] * 8}
+
+
+def retained_bytes(sessions, agents, searches, compact):
+    rng = random.Random(0)
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    kept = []
+    for _ in range(sessions):
+        session = []
+        for agent in range(1, agents + 1):
+            state = fake_state(rng, searches)
+            session.append(findings_record(agent, "q", state, 1.0) if compact else state)
+            del state
+        kept.append(session)
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return current - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--agents", type=int, default=3)
+    parser.add_argument("--searches", type=int, default=15)
+    args = parser.parse_args()
+
+    full = retained_bytes(args.sessions, args.agents, args.searches, compact=False)
+    compact = retained_bytes(args.sessions, args.agents, args.searches, compact=True)
+
+    print(f"sessions={args.sessions} agents/session={args.agents} searches/agent={args.searches}")
+    print(f"{'retained':<16} {'total KiB':>10} {'KiB/session':>12}")
+    for label, size in (("full states", full), ("findings records", compact)):
+        print(f"{label:<16} {size / 1024:>10.1f} {size / 1024 / args.sessions:>12.1f}")
+    print(f"reduction: {1 - compact / full:.0%}")
+
+
+if __name__ == "__main__":
+    main()
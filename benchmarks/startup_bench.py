@@ -0,0 +1,111 @@
+"""Measure cold-start import cost and rerun time of the Streamlit app.
+
+1. Runs `python -X importtime` in fresh interpreters for the modules app.py
+   imports at module level (read from its source) and for the deferred
+   pipeline/PDF modules, and prints
+   the cumulative import time of each top-level module.
+2. Uses Streamlit's AppTest to time the first script run and the average of
+   `--reruns` subsequent reruns.
+
+    python benchmarks/startup_bench.py --reruns 20
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFERRED_MODULES = ["research", "markdown_pdf"]
+
+
+def startup_modules():
+    """Top-level modules app.py imports at module level, in source order."""
+    with open(os.path.join(ROOT, "app.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(m.split(".")[0] for m in modules))
+
+
+def import_times(modules):
+    """Cumulative import time in ms of each module, measured in a fresh interpreter."""
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        last = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        return None, last
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if name in modules and cumulative.isdigit():
+            times[name] = int(cumulative) / 1000
+    return times, None
+
+
+def print_import_table(title, modules):
+    times, error = import_times(modules)
+    print(f"\n{title}")
+    if error:
+        print(f"  could not import: {error}")
+        return
+    for name in modules:
+        print(f"  {name:<16} {times.get(name, 0.0):>9.1f} ms")
+    print(f"  {'total':<16} {sum(times.values()):>9.1f} ms")
+
+
+def time_reruns(reruns):
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("\nstreamlit is not installed; skipping rerun timing")
+        return
+
+    os.chdir(ROOT)
+    # Keep the benchmark's history out of the repo's database
+    os.environ["History_db"] = os.path.join(tempfile.mkdtemp(prefix="startup-bench-"), "history.db")
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    start = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - start
+
+    samples = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - start)
+
+    print("\nStreamlit script runs")
+    print(f"  first run        {first * 1000:>9.1f} ms")
+    if samples:
+        print(f"  rerun (mean)     {sum(samples) / len(samples) * 1000:>9.1f} ms")
+        print(f"  rerun (max)      {max(samples) * 1000:>9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    print_import_table("Imported at startup by app.py", startup_modules())
+    print_import_table("Deferred until a run or PDF download", DEFERRED_MODULES)
+    time_reruns(args.reruns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+class Cancelled(Exception):
+    """Raised inside work whose cancel token has been triggered."""
+
+
+class CancelToken:
+    """Cooperative cancellation flag; cancelling a token also cancels its children."""
+
+    def __init__(self, parent: Optional["CancelToken"] = None):
+        self.parent = parent
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        return self.parent is not None and self.parent.cancelled
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise Cancelled(self.reason or (self.parent.reason if self.parent else None) or "cancelled")
+
+    def child(self) -> "CancelToken":
+        return CancelToken(parent=self)
+
+    def sleep(self, seconds: float, step: float = 0.05) -> None:
+        """Sleep for `seconds`, raising `Cancelled` as soon as the token fires."""
+        deadline = time.monotonic() + seconds
+        while True:
+            self.raise_if_cancelled()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._event.wait(min(step, remaining))
+
+
+_current_token: ContextVar[Optional[CancelToken]] = ContextVar("cancel_token", default=None)
+
+
+def current_token() -> Optional[CancelToken]:
+    return _current_token.get()
+
+
+def raise_if_cancelled() -> None:
+    """Checkpoint for long-running work; a no-op outside a cancellable scope."""
+    token = _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+@contextmanager
+def use_token(token: Optional[CancelToken]):
+    """Make `token` the current token for this thread/context."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def attach_cancel_callback(llm, token: CancelToken):
+    """Make every LLM request issued by `llm` check `token` before it starts.
+
+    Returns a copy of `llm` sharing its client. Chat models that do not accept
+    LangChain callbacks are returned unchanged.
+    """
+    if not hasattr(llm, "callbacks"):
+        return llm
+
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class CancelCallback(BaseCallbackHandler):
+        raise_error = True
+
+        def on_chat_model_start(self, *args, **kwargs):
+            token.raise_if_cancelled()
+
+        def on_llm_start(self, *args, **kwargs):
+            token.raise_if_cancelled()
+
+        def on_llm_new_token(self, *args, **kwargs):
+            token.raise_if_cancelled()
+
+    # Shallow copy: the shared model and its HTTP client stay untouched
+    return llm.model_copy(update={"callbacks": list(llm.callbacks or []) + [CancelCallback()]})
@@ -0,0 +1,99 @@
+"""Long-lived network clients shared by every run in the process.
+
+Search sessions and the Groq HTTP client keep their connections open between
+requests, so only the first request to a host pays for TCP/TLS setup.
+"""
+import atexit
+import importlib.util
+import queue
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Callable, Iterator, Optional
+
+from config import load_config
+
+
+# Process-wide cap on open HTTP connections to one provider
+MAX_CONNECTIONS = 1000
+
+
+def pool_size() -> int:
+    """Requests one run can have in flight: one per agent, doubled when hedging, plus the planner."""
+    config = load_config()
+    return config.max_agents * (2 if config.hedging else 1) + 1
+
+
+class ClientPool:
+    """Keeps up to `size` idle clients from `factory` for reuse across threads.
+
+    `acquire()` hands out an idle client, or builds a new one when all are in
+    use, so concurrent sessions never wait on the pool. Clients released while
+    the pool is full are closed, and so is a client whose request raised, in
+    case its connection is broken.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int):
+        self.factory = factory
+        self.size = size
+        self.created = 0
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def acquire(self) -> Iterator[Any]:
+        try:
+            client = self._idle.get_nowait()
+        except queue.Empty:
+            client = self.factory()
+            self.created += 1
+        try:
+            yield client
+        except BaseException:
+            _close(client)
+            raise
+        try:
+            self._idle.put_nowait(client)
+        except queue.Full:
+            _close(client)
+
+    def close(self) -> None:
+        while True:
+            try:
+                _close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def _close(client: Any) -> None:
+    try:
+        if hasattr(client, "close"):
+            client.close()
+        elif hasattr(client, "__exit__"):
+            client.__exit__(None, None, None)
+    except Exception:
+        pass
+
+
+@lru_cache(maxsize=None)
+def http_client(http2: Optional[bool] = None):
+    """Shared `httpx.Client` with keep-alive, and HTTP/2 when `h2` is installed.
+
+    The client serves every session in the process, so only idle keep-alive
+    connections are sized from `pool_size()`; the connection cap is set high
+    enough that concurrent sessions do not queue on the pool.
+    """
+    import httpx
+
+    if http2 is None:
+        http2 = importlib.util.find_spec("h2") is not None
+    client = httpx.Client(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=pool_size(),
+            keepalive_expiry=60,
+        ),
+        # Waiting for a free connection means the process is overloaded; fail fast
+        timeout=httpx.Timeout(120.0, connect=10.0, pool=10.0),
+    )
+    atexit.register(client.close)
+    return client
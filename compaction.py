@@ -0,0 +1,166 @@
+import json
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Rough chars-per-token ratio for English prose; good enough to pick thresholds
+CHARS_PER_TOKEN = 4
+
+OFFLOAD_DIR = "/search_results"
+COMPACTED_MARKER = "[compacted]"
+
+
+def as_text(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value, default=str, ensure_ascii=False)
+
+
+def estimate_tokens(value: Any) -> int:
+    return len(as_text(value)) // CHARS_PER_TOKEN + 1
+
+
+# ------------------------------ SEARCH RESULTS ------------------------------
+def _snippet_key(text: str) -> str:
+    return re.sub(r"\W+", " ", text.lower()).strip()[:120]
+
+
+def compact_results(
+    results: Iterable[Dict[str, Any]],
+    seen: Optional[Set[str]] = None,
+    body_chars: int = 300,
+) -> List[Dict[str, str]]:
+    """Reduce DDGS results to title/href/trimmed body and drop duplicates.
+
+    Args:
+        results: Raw DDGS result dicts.
+        seen: URLs and snippet keys already returned to this agent; updated in
+            place so repeated searches do not resend the same material.
+        body_chars: Maximum characters kept from each result body.
+    """
+    seen = set() if seen is None else seen
+    compact = []
+    for r in results:
+        href = r.get("href") or r.get("url") or ""
+        body = " ".join((r.get("body") or "").split())
+        key = _snippet_key(body)
+        if (href and href in seen) or (key and key in seen):
+            continue
+        seen.update(k for k in (href, key) if k)
+        if len(body) > body_chars:
+            body = body[:body_chars].rsplit(" ", 1)[0] + "…"
+        compact.append({"title": (r.get("title") or "").strip(), "href": href, "body": body})
+    return compact
+
+
+# ------------------------------ HISTORY COMPACTION ------------------------------
+def summarize_tool_output(content: str, path: str, max_items: int = 8) -> str:
+    """Short stand-in for an offloaded search result: titles and URLs only."""
+    try:
+        items = json.loads(content)
+    except (TypeError, ValueError):
+        items = None
+    if isinstance(items, list) and all(isinstance(i, dict) for i in items):
+        lines = [f"- {i.get('title', '')} ({i.get('href', '')})" for i in items[:max_items]]
+        if len(items) > max_items:
+            lines.append(f"- … {len(items) - max_items} more")
+        summary = "\n".join(lines)
+    else:
+        summary = str(content)[:200]
+    return f"{COMPACTED_MARKER} Full output saved to {path}; use read_file to see it.\n{summary}"
+
+
+def plan_compaction(
+    messages: List[Any],
+    threshold_tokens: int,
+    keep_recent: int = 2,
+    base_tokens: int = 0,
+) -> Tuple[Dict[int, str], Dict[str, str], int, int]:
+    """Decide which old tool outputs to replace once a request exceeds a budget.
+
+    Messages only need `type`, `content` and `tool_call_id` attributes, so
+    LangChain messages and simple stand-ins both work. `base_tokens` is the
+    part of every request that is not message history (system prompt and tool
+    schemas); it counts towards the budget but cannot be compacted.
+
+    Returns:
+        (replacements by message index, offloaded raw content by file path,
+        estimated tokens before, estimated tokens after)
+    """
+    before = base_tokens + sum(estimate_tokens(m.content) for m in messages)
+    if before <= threshold_tokens:
+        return {}, {}, before, before
+
+    tool_indexes = [i for i, m in enumerate(messages) if getattr(m, "type", None) == "tool"]
+    old = tool_indexes[:-keep_recent] if keep_recent else tool_indexes
+
+    replacements, offloaded = {}, {}
+    after = before
+    for i in old:
+        content = as_text(messages[i].content)
+        if content.startswith(COMPACTED_MARKER):
+            continue
+        path = f"{OFFLOAD_DIR}/{getattr(messages[i], 'tool_call_id', None) or i}.json"
+        summary = summarize_tool_output(content, path)
+        replacements[i] = summary
+        offloaded[path] = content
+        after += estimate_tokens(summary) - estimate_tokens(content)
+        if after <= threshold_tokens:
+            break
+    return replacements, offloaded, before, after
+
+
+def file_data(content: str) -> Dict[str, Any]:
+    """Entry in the deep agent's virtual file store."""
+    now = datetime.now(timezone.utc).isoformat()
+    return {"content": content.split("\n"), "created_at": now, "modified_at": now}
+
+
+def make_compaction_middleware(threshold_tokens: int = 12000, keep_recent: int = 2):
+    """Agent middleware that compacts old tool outputs before each model call.
+
+    Old search results are moved into the agent's virtual file store (so the
+    agent can `read_file` them again) and replaced in the message history by a
+    short summary. The budget covers the whole request: the system prompt and
+    tool schemas seen on the previous model call are counted too. Estimated
+    tokens before/after each step are kept in the middleware's `steps` list.
+    """
+    from langchain.agents.middleware import AgentMiddleware
+    from langchain_core.messages import ToolMessage
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    class ContextCompactionMiddleware(AgentMiddleware):
+        def __init__(self):
+            super().__init__()
+            self.steps: List[Tuple[int, int]] = []
+            self.base_tokens = 0
+
+        def before_model(self, state, runtime):
+            messages = state["messages"]
+            replacements, offloaded, before, after = plan_compaction(
+                messages, threshold_tokens, keep_recent, self.base_tokens
+            )
+            self.steps.append((before, after))
+            if not replacements:
+                return None
+            # Messages re-sent with the same id replace the originals in state
+            updated = [
+                ToolMessage(
+                    content=summary,
+                    id=messages[i].id,
+                    tool_call_id=messages[i].tool_call_id,
+                    name=getattr(messages[i], "name", None),
+                )
+                for i, summary in replacements.items()
+            ]
+            return {
+                "messages": updated,
+                "files": {path: file_data(content) for path, content in offloaded.items()},
+            }
+
+        def wrap_model_call(self, request, handler):
+            # before_model cannot see the prompt or tools; measure them for the next step
+            system = request.system_message.content if request.system_message is not None else ""
+            tools = [t if isinstance(t, dict) else convert_to_openai_tool(t) for t in request.tools or []]
+            self.base_tokens = estimate_tokens(system) + estimate_tokens(tools)
+            return handler(request)
+
+    return ContextCompactionMiddleware()
@@ -0,0 +1,50 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+
+def _flag(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class Config:
+    """Settings read from the environment (and `.env`) once per process."""
+    groq_api_key: Optional[str]
+    gemini_api_keys: Tuple[str, ...]
+    planner_model: str
+    max_agents: int
+    research_models: str
+    report_models: str
+    hedging: bool
+    hedge_after: Optional[float]
+    hedge_percentile: float
+    history_db: str
+    compaction_threshold: int
+    search_body_chars: int
+    # When set, full agent traces are written here for debugging instead of kept in memory
+    debug_traces_dir: Optional[str]
+
+
+@lru_cache(maxsize=None)
+def load_config() -> Config:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    gemini_keys = (os.getenv("Gemini_api_key1"), os.getenv("Gemini_api_key2"))
+    return Config(
+        groq_api_key=os.getenv("Groq_api_key"),
+        gemini_api_keys=tuple(k for k in gemini_keys if k),
+        planner_model=os.getenv("Planner_model", "llama-3.1-8b-instant"),
+        max_agents=int(os.getenv("Max_agents", "4")),
+        research_models=os.getenv("Research_models", "gemini:gemini-2.0-flash,groq:llama-3.3-70b-versatile"),
+        report_models=os.getenv("Report_models", "groq:meta-llama/llama-4-scout-17b-16e-instruct,gemini:gemini-2.0-flash"),
+        hedging=_flag(os.getenv("Hedging", "0")),
+        hedge_after=float(os.getenv("Hedge_after", "30")) or None,
+        hedge_percentile=float(os.getenv("Hedge_percentile", "95")),
+        history_db=os.getenv("History_db", "research_history.db"),
+        compaction_threshold=int(os.getenv("Compaction_threshold", "12000")),
+        search_body_chars=int(os.getenv("Search_body_chars", "300")),
+        debug_traces_dir=os.getenv("Debug_traces_dir") or None,
+    )
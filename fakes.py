@@ -0,0 +1,204 @@
+"""Local stand-ins for the LLM providers, DDGS and deep agents.
+
+Register fake models with `register_fake_provider()` and route to
+`ModelSpec(provider="fake", model="...", options=(("latency", 2.0), ("error_rate", 0.3)))`.
+`FakeDDGS` and `FakeDeepAgentFactory` replace `research.DDGS` and
+`research.create_deep_agent` to run the whole pipeline offline.
+"""
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from cancellation import current_token
+from routing import ModelSpec, register_provider
+
+
+class FakeProviderError(RuntimeError):
+    """Error injected by `FakeChatModel` to simulate an outage."""
+
+
+def _sleep(seconds: float) -> None:
+    # Honour hedging/run cancellation like a real client dropping its request
+    token = current_token()
+    if token is not None:
+        token.sleep(seconds)
+    else:
+        time.sleep(seconds)
+
+
+def _lognormal(rng: random.Random, median: float, jitter: float) -> float:
+    if median <= 0:
+        return 0.0
+    return median * rng.lognormvariate(0.0, jitter) if jitter else median
+
+
+class FakeChatModel:
+    """Chat model with configurable latency and failure rate.
+
+    Latency is drawn from a log-normal distribution around `latency` seconds,
+    which gives the long tail real providers show.
+    """
+
+    def __init__(
+        self,
+        name: str = "fake",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        reply: str = "fake response",
+        seed: Optional[int] = None,
+    ):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.reply = reply
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        with self._lock:
+            return _lognormal(self._rng, self.latency, self.jitter)
+
+    def invoke(self, messages: Any, *args, **kwargs) -> AIMessage:
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.error_rate
+        _sleep(self.sample_latency())
+        if fail:
+            raise FakeProviderError(f"{self.name}: injected failure")
+        return AIMessage(content=self.reply)
+
+
+# Default options for fake models configured by name only, e.g. through Research_models
+FAKE_PROFILES: Dict[str, Dict[str, Any]] = {}
+
+
+def fake_provider(spec: ModelSpec) -> FakeChatModel:
+    options = {**FAKE_PROFILES.get(spec.model, {}), **dict(spec.options)}
+    return FakeChatModel(name=spec.model, **options)
+
+
+def register_fake_provider(name: str = "fake", profiles: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+    """Serve provider `name` with fake models; `profiles` maps model names to options."""
+    FAKE_PROFILES.update(profiles or {})
+    register_provider(name, fake_provider)
+
+
+def fake_spec(model: str, **options) -> ModelSpec:
+    """Shorthand for a fake cascade entry, e.g. `fake_spec("slow", latency=3.0)`."""
+    return ModelSpec(provider="fake", model=model, options=tuple(sorted(options.items())))
+
+
+# ------------------------------ FAKE SEARCH ------------------------------
+class FakeDDGS:
+    """Drop-in for `ddgs.DDGS` returning generated results after a simulated delay."""
+
+    latency = 0.0
+    jitter = 0.0
+    _rng = random.Random()
+    _lock = threading.Lock()
+    _counter = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @classmethod
+    def configure(cls, latency: float = 0.0, jitter: float = 0.0, seed: Optional[int] = None) -> None:
+        cls.latency, cls.jitter, cls._rng = latency, jitter, random.Random(seed)
+
+    def text(self, query: str, max_results: int = 10, **kwargs) -> List[Dict[str, str]]:
+        with self._lock:
+            delay = _lognormal(self._rng, self.latency, self.jitter)
+            FakeDDGS._counter += 1
+            batch = FakeDDGS._counter
+        _sleep(delay)
+        return [
+            {
+                "title": f"{query} — result {i}",
+                "href": f"https://example.com/{batch}/{i}",
+                "body": f"Generated snippet {i} for '{query}'. " * 12,
+            }
+            for i in range(max_results)
+        ]
+
+
+# ------------------------------ FAKE DEEP AGENT ------------------------------
+class FakeDeepAgent:
+    """Mimics a deep agent's tool loop: model call, search, repeat, final answer.
+
+    Middleware `before_model` hooks run before each model call so context
+    compaction is exercised as in a real run.
+    """
+
+    def __init__(self, model, tools, middleware, steps: Tuple[int, int], rng: random.Random):
+        self.model = model
+        self.tools = list(tools or [])
+        self.middleware = list(middleware or [])
+        self.steps = steps
+        self.rng = rng
+
+    def _before_model(self, state: Dict[str, Any]) -> None:
+        for m in self.middleware:
+            update = m.before_model(state, None) if hasattr(m, "before_model") else None
+            if not update:
+                continue
+            replaced = {msg.id: msg for msg in update.get("messages", [])}
+            state["messages"] = [replaced.get(msg.id, msg) if msg.id else msg for msg in state["messages"]]
+            state["files"].update(update.get("files", {}))
+
+    def invoke(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        query = inputs["messages"][0]["content"]
+        state = {"messages": [HumanMessage(content=query)], "files": {}, "todos": []}
+        for step in range(self.rng.randint(*self.steps) if self.tools else 0):
+            self._before_model(state)
+            self.model.invoke(state["messages"])
+            call_id = f"call_{step}"
+            state["messages"].append(AIMessage(
+                content="",
+                tool_calls=[{"name": "internet_search", "args": {"query": query}, "id": call_id}],
+            ))
+            output = self.tools[0](query=f"{query[:60]} angle {step}", agent_number=1)
+            state["messages"].append(ToolMessage(content=output, tool_call_id=call_id, id=f"tool_{call_id}"))
+        self._before_model(state)
+        state["messages"].append(self.model.invoke(state["messages"]))
+        return state
+
+
+class FakeDeepAgentFactory:
+    """Callable with the signature of `deepagents.create_deep_agent`."""
+
+    def __init__(self, steps: Tuple[int, int] = (3, 8), seed: Optional[int] = None):
+        self.steps = steps
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, model=None, tools=None, system_prompt: str = "", middleware=(), **kwargs) -> FakeDeepAgent:
+        with self._lock:
+            rng = random.Random(self._rng.random())
+        return FakeDeepAgent(model, tools, middleware, self.steps, rng)
+
+
+def install_fake_backends(
+    profiles: Dict[str, Dict[str, Any]],
+    search_latency: float = 0.0,
+    search_jitter: float = 0.0,
+    steps: Tuple[int, int] = (3, 8),
+    seed: Optional[int] = None,
+    providers: Tuple[str, ...] = ("fake", "gemini", "groq"),
+) -> None:
+    """Route every provider, search and agent in `research` to local fakes."""
+    import research
+
+    for provider in providers:
+        register_fake_provider(provider, profiles)
+    FakeDDGS.configure(search_latency, search_jitter, seed)
+    research.DDGS = FakeDDGS
+    research.create_deep_agent = FakeDeepAgentFactory(steps, seed)
@@ -0,0 +1,78 @@
+import json
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+URL_PATTERN = re.compile(r"https?://[^\s'\"\]\),]+")
+
+
+def final_text(messages) -> Optional[str]:
+    """Text of the last AI message that has any, which holds the agent's answer."""
+    for m in reversed(messages):
+        if getattr(m, "type", None) != "ai":
+            continue
+        # `.text` joins the text blocks of list content and skips tool calls and reasoning
+        text = getattr(m, "text", m.content)
+        if text:
+            return text
+    return None
+
+
+def extract_sources(messages) -> List[str]:
+    """Collect the URLs returned by `internet_search` calls, in first-seen order."""
+    urls = []
+    for m in messages:
+        if getattr(m, "type", None) == "tool":
+            urls.extend(URL_PATTERN.findall(str(m.content)))
+    return list(dict.fromkeys(urls))
+
+
+def dump_trace(state: Dict[str, Any], directory: str, label: str) -> str:
+    """Write an agent's full final state to `directory` as JSON and return the path."""
+    from langchain_core.messages import messages_to_dict
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{label}.json")
+    trace = {
+        "messages": messages_to_dict(state.get("messages", [])),
+        "files": state.get("files", {}),
+        "todos": state.get("todos", []),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(trace, f, ensure_ascii=False, default=str)
+    return path
+
+
+def findings_record(
+    agent_num: int,
+    query: str,
+    state: Dict[str, Any],
+    duration: float,
+    prefill_steps=(),
+    trace_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Reduce a deep agent's final state to the small record the pipeline keeps.
+
+    The full state (message history, tool outputs, virtual files) is dropped
+    once this returns; with `trace_dir` set it is written to disk first.
+    """
+    messages = state.get("messages", [])
+    record = {
+        "agent": agent_num,
+        "query": query,
+        "text": final_text(messages),
+        "sources": extract_sources(messages),
+        "stats": {
+            "duration_s": round(duration, 2),
+            "messages": len(messages),
+            "searches": sum(1 for m in messages if getattr(m, "type", None) == "tool"),
+            "files": len(state.get("files", {}) or {}),
+            "model_calls": len(prefill_steps),
+            "max_prefill_tokens": max((before for before, _ in prefill_steps), default=0),
+        },
+        "trace_path": None,
+    }
+    if trace_dir:
+        record["trace_path"] = dump_trace(state, trace_dir, f"agent{agent_num}")
+    return record
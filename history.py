@@ -0,0 +1,177 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    query TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'complete',
+    report TEXT NOT NULL DEFAULT '',
+    findings TEXT NOT NULL DEFAULT '[]',
+    sources TEXT NOT NULL DEFAULT '[]',
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS runs_created_at ON runs(created_at DESC);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS runs_fts USING fts5(
+    query, report, findings,
+    content='runs', content_rowid='id', tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS runs_ai AFTER INSERT ON runs BEGIN
+    INSERT INTO runs_fts(rowid, query, report, findings)
+    VALUES (new.id, new.query, new.report, new.findings);
+END;
+CREATE TRIGGER IF NOT EXISTS runs_ad AFTER DELETE ON runs BEGIN
+    INSERT INTO runs_fts(runs_fts, rowid, query, report, findings)
+    VALUES ('delete', old.id, old.query, old.report, old.findings);
+END;
+CREATE TRIGGER IF NOT EXISTS runs_au AFTER UPDATE ON runs BEGIN
+    INSERT INTO runs_fts(runs_fts, rowid, query, report, findings)
+    VALUES ('delete', old.id, old.query, old.report, old.findings);
+    INSERT INTO runs_fts(rowid, query, report, findings)
+    VALUES (new.id, new.query, new.report, new.findings);
+END;
+"""
+
+# Columns returned by listings; the report body is only loaded on demand
+SUMMARY_COLUMNS = "runs.id, runs.query, runs.created_at, runs.status, runs.metadata"
+
+
+def fts_query(text: str, any_term: bool = False) -> str:
+    """Turn free text into an FTS5 query that matches all (or any) of its words."""
+    terms = [t.replace('"', '""') for t in text.split()]
+    return (" OR " if any_term else " ").join(f'"{t}"' for t in terms if t)
+
+
+def topic_words(text: str) -> set:
+    return {w for w in re.findall(r"\w+", text.lower()) if len(w) > 2}
+
+
+class HistoryStore:
+    """SQLite-backed store of past research runs with full-text search.
+
+    One connection is shared by all Streamlit sessions of the process, guarded
+    by a lock; WAL mode keeps reads fast while a run is being saved.
+    """
+
+    def __init__(self, path: str = "research_history.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------ WRITES ------------------------------
+    def save_run(
+        self,
+        query: str,
+        report: str,
+        findings: Sequence[str] = (),
+        sources: Sequence[str] = (),
+        metadata: Optional[Dict[str, Any]] = None,
+        status: str = "complete",
+    ) -> int:
+        """Persist a research run and return its id."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (query, created_at, status, report, findings, sources, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    query,
+                    time.time(),
+                    status,
+                    report,
+                    json.dumps(list(findings)),
+                    json.dumps(list(sources)),
+                    json.dumps(metadata or {}),
+                ),
+            )
+            return cursor.lastrowid
+
+    def delete_run(self, run_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+
+    # ------------------------------ READS ------------------------------
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        item = dict(row)
+        for column in ("findings", "sources", "metadata"):
+            if column in item:
+                item[column] = json.loads(item[column])
+        return item
+
+    def get_run(self, run_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list_runs(self, page: int = 0, page_size: int = 10) -> Tuple[List[Dict[str, Any]], int]:
+        """Return one page of runs, newest first, plus the total number of runs."""
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT {SUMMARY_COLUMNS} FROM runs ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (page_size, page * page_size),
+            ).fetchall()
+        return [self._to_dict(r) for r in rows], total
+
+    def find_previous(self, query: str, min_overlap: float = 0.6) -> Optional[Dict[str, Any]]:
+        """Return the latest run on the same topic as `query`, if any.
+
+        Candidates come from the FTS index on past queries and must share at
+        least `min_overlap` of their words (Jaccard) with `query`. Complete runs
+        can be refreshed; cancelled and failed runs hold partial findings a new
+        run can resume from.
+        """
+        words = topic_words(query)
+        match = fts_query(" ".join(sorted(words)), any_term=True)
+        if not match:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT runs.id, runs.query FROM runs_fts JOIN runs ON runs.id = runs_fts.rowid "
+                "WHERE runs_fts MATCH ? AND runs.status IN ('complete', 'cancelled', 'failed') "
+                "ORDER BY runs.created_at DESC LIMIT 50",
+                (f"query : ({match})",),
+            ).fetchall()
+
+        best_id, best_overlap = None, min_overlap
+        for row in rows:
+            other = topic_words(row["query"])
+            overlap = len(words & other) / len(words | other)
+            if overlap > best_overlap or (best_id is None and overlap >= best_overlap):
+                best_id, best_overlap = row["id"], overlap
+        return self.get_run(best_id) if best_id is not None else None
+
+    def search(self, text: str, page: int = 0, page_size: int = 10) -> Tuple[List[Dict[str, Any]], int]:
+        """Full-text search over queries, findings and reports, best matches first."""
+        match = fts_query(text)
+        if not match:
+            return self.list_runs(page, page_size)
+        with self._lock:
+            total = self._conn.execute(
+                "SELECT COUNT(*) FROM runs_fts WHERE runs_fts MATCH ?", (match,)
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT {SUMMARY_COLUMNS}, "
+                "snippet(runs_fts, -1, '**', '**', '…', 12) AS snippet "
+                "FROM runs_fts JOIN runs ON runs.id = runs_fts.rowid "
+                "WHERE runs_fts MATCH ? ORDER BY bm25(runs_fts, 10.0, 1.0, 1.0) LIMIT ? OFFSET ?",
+                (match, page_size, page * page_size),
+            ).fetchall()
+        return [self._to_dict(r) for r in rows], total
@@ -0,0 +1,161 @@
+import json
+import re
+from typing import List, Optional
+
+MAX_AGENTS = 4
+
+# Words that usually signal a broad, multi-faceted question
+BROAD_MARKERS = (
+    "compare", "comparison", "versus", " vs ", "survey", "landscape", "market",
+    "overview", "trends", "state of", "pros and cons", "history of", "impact of",
+    "future of", "ecosystem", "alternatives", "analysis of",
+)
+
+# Words that mark a comparison, whose parts are usually single names
+COMPARE_MARKERS = ("compare", "comparison", "versus", " vs ", " vs. ", "difference between", "differences between")
+
+# Fixed expressions whose "and" does not join two separate subtopics
+COMPOUND_PHRASES = (
+    "pros and cons", "advantages and disadvantages", "strengths and weaknesses",
+    "research and development", "supply and demand", "mergers and acquisitions",
+    "trial and error", "terms and conditions",
+)
+
+# Stands in for the "and" of a compound phrase while a query is split
+_JOINED_AND = "\x00"
+
+# Fixed research angles used when a query has to be fanned out without an LLM
+DEFAULT_ANGLES = (
+    "background, definitions and core concepts",
+    "current state, key players and recent developments",
+    "data, statistics and concrete case studies",
+    "challenges, criticism and future outlook",
+)
+
+
+# ------------------------------ HEURISTIC PLANNER ------------------------------
+def _join_phrases(text: str) -> str:
+    """Mask the "and" inside compound phrases so it is not treated as a separator."""
+    for phrase in COMPOUND_PHRASES:
+        text = re.sub(
+            re.escape(phrase).replace(r"\ and\ ", r"\s+and\s+"),
+            lambda m: re.sub(r"\band\b", _JOINED_AND, m.group(0), flags=re.IGNORECASE),
+            text,
+            flags=re.IGNORECASE,
+        )
+    return text
+
+
+def _topic_ands(query: str) -> int:
+    """Count the "and"s that join separate topics, not two names ("Tom and Jerry")."""
+    words = _join_phrases(query).split()
+    count = 0
+    for i in range(1, len(words) - 1):
+        if words[i].lower() != "and":
+            continue
+        left, right = words[i - 1], words[i + 1]
+        # "A, B and C" is a list even when its items are names
+        listed = left.endswith(",") or (i >= 2 and words[i - 2].endswith(","))
+        if left[:1].isupper() and right[:1].isupper() and not listed:
+            continue
+        count += 1
+    return count
+
+
+def _is_comparison(query: str) -> bool:
+    text = f" {query.lower().strip()} "
+    return any(marker in text for marker in COMPARE_MARKERS)
+
+
+def estimate_agent_count(query: str, max_agents: int = MAX_AGENTS) -> int:
+    """Guess how many research agents a query deserves without calling an LLM.
+
+    Args:
+        query: The user's research question.
+        max_agents: Upper bound on the number of agents to launch.
+
+    Returns:
+        Number of agents between 1 and max_agents.
+    """
+    text = _join_phrases(f" {query.lower().strip()} ")
+    words = len(text.split())
+
+    score = 0
+    if words > 8:
+        score += 1
+    if words > 20:
+        score += 1
+    score += sum(1 for marker in BROAD_MARKERS if _join_phrases(marker) in text)
+    score += text.count(",") + _topic_ands(query)
+    score += max(text.count("?") - 1, 0)
+
+    if score == 0:
+        return 1
+    return max(1, min(max_agents, 1 + (score + 1) // 2))
+
+
+def split_query(query: str, count: int) -> List[str]:
+    """Split a query into `count` subtopics using its own structure or default angles."""
+    if count <= 1:
+        return [query.strip()]
+
+    parts = [
+        p.strip(" ?.").replace(_JOINED_AND, "and")
+        for p in re.split(r",|;|\?|\band\b|\bvs\.?\b|\bversus\b", _join_phrases(query), flags=re.IGNORECASE)
+    ]
+    # Compared items are often single names ("LangGraph, CrewAI and AutoGen")
+    min_words = 1 if _is_comparison(query) else 2
+    parts = [re.sub(r"^(compare|comparison of|differences? between)\s+", "", p, flags=re.IGNORECASE) for p in parts]
+    parts = [p for p in parts if len(p.split()) >= min_words]
+    if len(parts) >= count:
+        return [f"{query.strip()} — focus on: {p}" for p in parts[:count]]
+
+    return [f"{query.strip()} — focus on: {angle}" for angle in DEFAULT_ANGLES[:count]]
+
+
+# ------------------------------ LLM PLANNER ------------------------------
+PLANNER_PROMPT = """You plan research work for a team of web research agents.
+
+Decide how many agents (1 to {max_agents}) are needed to research the question below, and give each agent one distinct subtopic.
+Simple factual or definitional questions need exactly 1 agent. Broad surveys, comparisons or multi-part questions need more.
+
+Respond with ONLY a JSON array of subtopic strings, one per agent. No prose, no code fences.
+
+Question: {query}"""
+
+
+def parse_subtopics(text: str, max_agents: int = MAX_AGENTS) -> List[str]:
+    """Extract the subtopic list from the planner model's reply."""
+    match = re.search(r"\[.*\]", text, flags=re.DOTALL)
+    if not match:
+        raise ValueError("planner reply does not contain a JSON array")
+    subtopics = [str(s).strip() for s in json.loads(match.group(0)) if str(s).strip()]
+    if not subtopics:
+        raise ValueError("planner returned no subtopics")
+    return subtopics[:max_agents]
+
+
+def plan_research(query: str, llm: Optional[object] = None, max_agents: int = MAX_AGENTS) -> List[str]:
+    """Decompose a research question into one subtopic per research agent.
+
+    Args:
+        query: The user's research question.
+        llm: Optional cheap chat model used to decompose the query. When it is
+            missing, raises or its reply cannot be parsed, a keyword heuristic
+            is used.
+        max_agents: Upper bound on the number of agents to launch.
+
+    Returns:
+        A list of agent queries; its length is the number of agents to run.
+    """
+    if llm is not None:
+        try:
+            reply = llm.invoke(PLANNER_PROMPT.format(query=query, max_agents=max_agents))
+            subtopics = parse_subtopics(getattr(reply, "content", reply), max_agents)
+            if len(subtopics) == 1:
+                return [query.strip()]
+            return [f"{query.strip()} — focus on: {s}" for s in subtopics]
+        except Exception:
+            pass
+
+    return split_query(query, estimate_agent_count(query, max_agents))
@@ -0,0 +1,690 @@
+"""Research pipeline: planning, parallel research agents and report writing.
+
+Kept out of app.py so the heavy provider imports below only load when a run
+actually starts.
+"""
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ddgs import DDGS
+from deepagents import create_deep_agent
+from langsmith.run_helpers import traceable
+
+from cancellation import Cancelled, CancelToken, current_token, raise_if_cancelled, use_token
+from clients import ClientPool, pool_size
+from compaction import compact_results, make_compaction_middleware
+from config import load_config
+from findings import final_text, findings_record
+from planner import plan_research
+from routing import ModelRouter, make_routed_model
+from sections import merge_sections
+
+
+# ------------------------------ TOOL FUNCTION ------------------------------
+@lru_cache(maxsize=None)
+def search_pool() -> ClientPool:
+    """DDGS sessions shared by every agent, keeping their connections alive between searches."""
+    # Resolve DDGS at call time so a patched `research.DDGS` is picked up
+    return ClientPool(lambda: DDGS(), pool_size())
+
+
+def make_internet_search(timelimit: Optional[str] = None, exclude_urls: Iterable[str] = ()):
+    """Build the search tool, optionally limited to recent results and unseen URLs.
+
+    Args:
+        timelimit: DDGS time filter ("d", "w", "m" or "y"), None for any time.
+        exclude_urls: URLs already known from a previous run; they are dropped
+            from the results.
+
+    Each tool instance remembers the URLs and snippets it has returned, so an
+    agent never receives the same result twice.
+    """
+    excluded = frozenset(exclude_urls)
+    seen = set()
+    # Over-fetch a little so filtered-out URLs do not shrink the result page
+    padding = min(len(excluded), 10)
+
+    @traceable(run_type="tool", name="internet_search")
+    def internet_search(query: str, agent_number: int, max_results: int = 5) -> str:
+        """Search the internet for information using DuckDuckGo.
+        
+        Args:
+            query: The search query string to find relevant information.
+            agent_number: The agent number making the search for tracking purposes.
+            max_results: The maximum number of search results to return (default: 5).
+        
+        Returns:
+            A JSON list of new search results, each with a title, href and trimmed body.
+        """
+        raise_if_cancelled()
+        with search_pool().acquire() as ddgs:
+            results = ddgs.text(
+                query,
+                max_results=max_results + 5 * (agent_number - 1) + padding,
+                timelimit=timelimit,
+            )
+        raise_if_cancelled()
+        if excluded:
+            results = [r for r in results if r.get("href") not in excluded]
+        results = results[5 * (agent_number - 1): (5 * (agent_number - 1)) + max_results]
+        return json.dumps(compact_results(results, seen, load_config().search_body_chars), ensure_ascii=False)
+
+    return internet_search
+
+
+def search_timelimit(age_seconds: float) -> Optional[str]:
+    """Smallest DDGS time filter that covers everything since the last run.
+
+    Returns None (no filter) when the last run is more than a year old.
+    """
+    days = age_seconds / 86400
+    if days <= 1:
+        return "d"
+    if days <= 7:
+        return "w"
+    if days <= 31:
+        return "m"
+    if days <= 365:
+        return "y"
+    return None
+
+
+# ------------------------------ AGENT FUNCTION ------------------------------
+def run_agent(
+    agent_num: int,
+    query: str,
+    router: ModelRouter,
+    timelimit: Optional[str] = None,
+    exclude_urls: Iterable[str] = (),
+):
+    research_system_prompt = f"""You are an expert researcher with a singular mission: to conduct comprehensive, methodical research and transform your findings into polished, authoritative reports that inform and enlighten.
+
+  Your research methodology combines systematic information gathering with critical analysis, ensuring that every report you produce is accurate, well-sourced, and actionable.
+
+  ## Agent Identity
+
+  You are assigned a unique **agent number** that identifies you in multi-agent research scenarios. You must include this agent number when using research tools to track which agent conducted which searches and gathered which information.
+  ═══════════════════════════════════════════════════════════
+                YOUR AGENT NUMBER: {agent_num}
+  ═══════════════════════════════════════════════════════════
+
+  ## Core Responsibilities
+
+  ### 1. Research Execution
+  You are responsible for conducting thorough, multi-faceted research that:
+  - Explores topics from multiple angles and perspectives
+  - Validates information across diverse, credible sources
+  - Identifies patterns, trends, and insights within the data
+  - Distinguishes between factual information and opinion
+  - Recognizes gaps in available information and acknowledges limitations
+
+  ### 2. Report Writing - COMPREHENSIVE DEPTH REQUIRED
+
+  **CRITICAL**: You must produce detailed, comprehensive reports that thoroughly explore the research topic. Brief summaries or superficial overviews are NOT acceptable.
+
+  Your reports must:
+  - **Be substantive in length**: Reports should typically span multiple sections with in-depth analysis (minimum 1000-2000 words for standard topics, more for complex subjects)
+  - **Provide comprehensive coverage**: Address all major aspects, subtopics, and relevant dimensions of the research question
+  - **Include detailed explanations**: Go beyond surface-level facts to explain mechanisms, causes, implications, and contexts
+  - **Present rich evidence**: Include specific examples, case studies, statistical data, expert quotes, and concrete illustrations
+  - **Offer deep analysis**: Don't just report what you found—analyze patterns, draw connections, identify trends, and provide insights
+  - **Structure with clear sections**: Use headings, subheadings, and logical organization to guide readers through complex information
+  - **Support every major claim**: Back up assertions with evidence from your research, properly attributed
+  - **Provide context and background**: Help readers understand why the topic matters and how different pieces fit together
+  - **Include actionable insights**: Where appropriate, offer practical recommendations, implications, or next steps
+  - **Maintain professional quality**: Use precise language, proper formatting, and thorough documentation
+
+  **Report Structure Guidelines**:
+  - Executive Summary (for longer reports)
+  - Introduction with context and scope
+  - Multiple substantive body sections (3-5+ depending on complexity)
+  - Analysis and synthesis of findings
+  - Conclusions and implications
+  - References or sources consulted
+
+  **Depth Indicators**:
+  - Each major point should be explored in detail, not just mentioned
+  - Include specific data points, dates, names, and concrete details
+  - Explain how and why, not just what
+  - Compare and contrast different perspectives or approaches
+  - Discuss implications, limitations, and areas of uncertainty
+
+  ## Available Tools
+
+  ### `internet_search`
+
+  **Purpose**: Your primary tool for gathering current, publicly available information from across the internet.
+
+  **Functionality**: Executes web searches and retrieves relevant results based on your specified query parameters. Tracks which agent performed the search for coordination in multi-agent environments.
+
+  **Parameters**:
+  - `query` (string, required): The search query string. Craft this carefully to maximize relevance and precision of results. Use specific terminology, key phrases, and search operators when needed to refine results.
+  - `agent_num` (integer, required): Your assigned agent number. You must always pass your agent number when calling this tool to maintain proper attribution and coordination across multiple research agents.
+  - `max_results` (integer, optional): The maximum number of search results to return. Adjust this based on the breadth and depth required for your research topic. More results provide broader coverage but require more analysis time.
+
+  **Best Practices**:
+  - Formulate queries that are specific enough to yield relevant results but broad enough to capture diverse perspectives
+  - Use multiple searches with varied query formulations to ensure comprehensive coverage
+  - Start with broader searches to understand the landscape, then narrow down to specific aspects
+  - Consider searching for primary sources, expert analyses, statistical data, and recent developments separately
+  - Evaluate the quality and credibility of sources before incorporating information into your report
+  - Always include your agent number in every search call
+  - Conduct sufficient searches to gather enough material for a detailed, comprehensive report
+
+  **Usage Guidelines**:
+  - Always verify critical facts across multiple independent sources
+  - Prioritize authoritative sources such as academic institutions, government agencies, industry experts, and reputable publications
+  - Note when information is contested, outdated, or lacks consensus
+  - Document your search strategy so your research process is transparent and reproducible
+
+  ## Research Workflow
+
+  1. **Receive Agent Assignment**: Note your agent number at the beginning of your research task
+  2. **Define Scope**: Clearly understand what information is needed and the purpose of the report
+  3. **Initial Research**: Conduct broad searches (including your agent number) to map the information landscape
+  4. **Deep Dive**: Perform targeted searches on specific aspects that require detailed examination—conduct as many searches as needed to gather comprehensive information
+  5. **Cross-Verification**: Validate key findings across multiple sources
+  6. **Synthesis**: Organize findings into a coherent narrative structure with detailed coverage of all major aspects
+  7. **Report Drafting**: Write a polished, detailed report that presents your research thoroughly and professionally—not a brief summary
+  8. **Quality Check**: Review for accuracy, completeness, depth, and clarity
+
+  ## Multi-Agent Coordination
+
+  When working alongside other research agents:
+  - Always use your assigned agent number in tool calls
+  - Be aware that other agents may be researching related or complementary topics
+  - Contribute your unique perspective and findings to the collective research effort
+  - Ensure your report is detailed enough to stand on its own while complementing other agents' work
+
+  ## Quality Standards
+
+  Your report will be evaluated on:
+  - **Comprehensiveness**: Did you cover all important aspects in detail?
+  - **Depth**: Did you go beyond surface-level information to provide real insight?
+  - **Evidence**: Are claims well-supported with specific sources and data?
+  - **Clarity**: Is complex information presented in an understandable way?
+  - **Professional quality**: Does the report meet publication-ready standards?
+
+  Remember: Your value lies not just in gathering information, but in your ability to discern what is relevant, reliable, and significant, then communicate it effectively through well-crafted, detailed, comprehensive reports that truly inform and enlighten your readers. A few paragraphs is never sufficient—invest the effort to create reports worthy of the research you conduct.
+  """
+
+    config = load_config()
+    compaction = make_compaction_middleware(config.compaction_threshold)
+    agent_instance = create_deep_agent(
+        # Offsetting by agent number spreads parallel agents across API keys
+        model=make_routed_model(router, "research", offset=agent_num - 1),
+        tools=[make_internet_search(timelimit, exclude_urls)],
+        system_prompt=research_system_prompt,
+        middleware=[compaction],
+    )
+
+    started = time.monotonic()
+    state = agent_instance.invoke({
+        "messages": [{"role": "user", "content": query}]
+    })
+    # Only the compact record outlives this call; the full state is garbage
+    return findings_record(
+        agent_num,
+        query,
+        state,
+        time.monotonic() - started,
+        prefill_steps=compaction.steps,
+        trace_dir=config.debug_traces_dir,
+    )
+
+# ---------------------------- INCREMENTAL REFRESH ----------------------------
+def incremental_query(subtopic: str, previous_run: Dict[str, Any], max_listed: int = 20) -> str:
+    """Ask an agent to look only for what is new since `previous_run`."""
+    since = datetime.fromtimestamp(previous_run["created_at"]).strftime("%Y-%m-%d")
+    known = "\n".join(f"- {url}" for url in previous_run["sources"][:max_listed])
+    return f"""{subtopic}
+
+This topic was already researched on {since}. Only research developments, data and sources that are NEW since then; do not repeat what an earlier report would already cover.
+Already known sources (do not revisit):
+{known or "- none recorded"}"""
+
+
+def update_report(router: ModelRouter, previous_run: Dict[str, Any], new_findings: str) -> str:
+    """Patch the stored report with new findings instead of rewriting it.
+
+    The writer only returns the sections that change, which are merged into
+    the existing report by heading.
+    """
+    existing_report = previous_run["report"]
+    if not new_findings.strip():
+        return existing_report
+
+    since = datetime.fromtimestamp(previous_run["created_at"]).strftime("%Y-%m-%d")
+    report_patch_instructions = f"""You are an expert report editor maintaining an existing markdown research report.
+
+You will receive the current report and new research findings gathered since {since}. Update the report with the new information.
+
+## Output Rules
+- Output ONLY the sections that must change, each starting with its exact `##` heading from the current report.
+- To add new material that fits no existing section, output a new `##` section (for example `## Recent Developments`).
+- Reproduce every section you output in full, including the unchanged parts of that section.
+- If new sources were used, output the complete updated `## References and Sources` section.
+- Do not output sections that need no change. If nothing is new, output nothing.
+- Use proper markdown formatting and keep the tone and depth of the existing report.
+"""
+
+    def patch(report_llm):
+        final_agent = create_deep_agent(
+            model=report_llm,
+            system_prompt=report_patch_instructions,
+        )
+
+        return final_agent.invoke({
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"""CURRENT REPORT:
+{existing_report}
+
+NEW RESEARCH FINDINGS:
+{new_findings}
+
+Output the changed and new sections now."""
+                }
+            ]
+        })
+
+    patch_text = final_text(patch(make_routed_model(router, "report"))["messages"])
+    if not patch_text:
+        return existing_report
+    return merge_sections(existing_report, patch_text)
+
+
+# ------------------------------ REPORT WRITER ------------------------------
+def write_report(router: ModelRouter, text_content: str) -> Optional[str]:
+    """Synthesize the agents' findings into the full markdown report."""
+    report_generation_instructions = f"""You are an expert report writer specializing in synthesizing research findings into comprehensive, professional-grade reports in markdown format.
+
+## Your Role
+
+You will receive research findings and analysis from previous research agents who have gathered information on a specific topic. Your task is to transform this raw research data into a polished, detailed, publication-ready report using proper markdown formatting.
+
+## What You'll Receive
+
+The input data may include:
+- Search results and web content from research agents
+- Analyzed information, patterns, and insights
+- Multiple perspectives and viewpoints
+- Supporting evidence, examples, and data
+- Source attributions and references
+  ═══════════════════════════════════════════════════════════
+                YOUR input data: {text_content}
+  ═══════════════════════════════════════════════════════════
+Your job is to synthesize all this information into one cohesive, comprehensive narrative.
+
+## Report Requirements
+
+### 1. Format: Markdown
+Use proper markdown syntax throughout:
+- Headers (# H1, ## H2, ### H3) for clear structure
+- **Bold** and *italic* for emphasis
+- Bullet points and numbered lists for organization
+- Tables for comparative data
+- `Code formatting` for technical terms
+- > Blockquotes for important findings
+
+### 2. Length and Depth: COMPREHENSIVE
+**This is critical**: Your report must be substantial and thorough.
+- **Minimum 1500-2500 words** (more for complex topics)
+- **Multiple detailed sections** that fully explore the topic
+- **In-depth explanations** with specific details: names, dates, statistics, examples
+- **Analytical depth**: Don't just report facts—analyze, compare, synthesize, and provide insights
+- Each major section should be 300-500+ words with detailed coverage
+
+### 3. Required Structure
+
+Your report must include these components:
+
+**# Title**
+- Clear, descriptive title that captures the topic
+
+**## Executive Summary**
+- 2-3 paragraphs summarizing key findings and insights
+- Provides high-level overview for quick understanding
+
+**## Introduction**
+- Set context and explain why the topic matters
+- Define scope and what the report will cover
+- Provide relevant background information
+- Multiple paragraphs to establish foundation
+
+**## Main Body Sections (3-5 major sections)**
+- Each section explores a major aspect of the topic in depth
+- Use descriptive headers that indicate content
+- Include subsections (###) to organize complex information
+- Provide detailed explanations with specific examples
+- Support claims with evidence from research
+
+**## Analysis and Insights**
+- Synthesize findings across all sections
+- Identify patterns, trends, and connections
+- Provide expert analysis and interpretation
+- Compare different approaches or perspectives
+- Discuss what the findings mean
+
+**## Implications and Applications**
+- Practical applications and real-world impact
+- Future directions or emerging trends
+- How findings can be used or applied
+
+**## Challenges and Considerations**
+- Limitations or gaps in current knowledge
+- Areas of debate or uncertainty
+- Potential obstacles or concerns
+
+**## Conclusion**
+- Synthesize key takeaways
+- Reinforce main insights
+- Discuss broader significance
+
+**## References and Sources**
+- List key sources consulted
+- Organize appropriately (alphabetically or by relevance)
+
+### 4. Content Quality Standards
+
+**Depth**:
+- Go beyond surface-level information
+- Explain mechanisms, causes, and implications
+- Include specific examples and case studies
+- Address the "how" and "why," not just "what"
+
+**Evidence**:
+- Back up every major claim with supporting data
+- Include relevant statistics, quotes, and findings
+- Reference sources appropriately
+- Note when sources are particularly authoritative
+
+**Analysis**:
+- Provide interpretation, not just reporting
+- Identify relationships and patterns in the data
+- Compare and contrast different viewpoints
+- Discuss implications and significance
+- Acknowledge uncertainties or debates
+
+**Clarity**:
+- Use professional, accessible language
+- Define technical terms when introduced
+- Organize information logically
+- Ensure smooth transitions between sections
+- Maintain consistent tone throughout
+
+## Writing Guidelines
+
+**Style**:
+- Professional and authoritative tone
+- Clear, engaging prose with varied sentence structure
+- Objective presentation with balanced perspectives
+- Active voice where appropriate
+
+**Content Development**:
+- Start with context and framework
+- Dive into specifics with detailed exploration
+- Connect ideas and show relationships
+- Add value through analysis and synthesis
+- Include practical implications
+
+**What to Avoid**:
+- Brief, superficial summaries
+- Bullet-point-only sections without explanation
+- Vague generalizations without details
+- Unsupported claims
+- Single-paragraph treatment of complex topics
+- Missing context or background
+
+## Working with Research Data
+
+- **Extract comprehensively**: Use all relevant information provided
+- **Synthesize sources**: Combine information from multiple research results
+- **Maintain attribution**: Reference where information came from
+- **Handle conflicts**: When sources disagree, present both perspectives
+- **Add context**: Explain and connect disparate pieces of information
+- **Organize logically**: Structure information for maximum clarity
+
+## Markdown Best Practices
+
+**Use tables** for:
+- Feature comparisons
+- Timeline of events
+- Quantitative data
+- Pros and cons
+
+Example:
+```markdown
+| Feature | Description | Impact |
+|---------|-------------|--------|
+| Detail  | Explanation | Result |
+```
+
+**Use formatting** strategically:
+- **Bold** for key concepts and important terms
+- *Italic* for emphasis
+- `Code` for technical terms or specific names
+- > Blockquotes for significant quotes or findings
+--------------------------------------------------------------------
+markdown format ends here
+## Final Quality Check
+
+Before delivering, ensure:
+✅ Report is comprehensive (1500+ words minimum)
+✅ All major aspects covered in detail
+✅ Each section provides substantial information
+✅ Claims supported with specific evidence
+✅ Analysis goes beyond surface-level reporting
+✅ Logical structure with clear organization
+✅ Proper markdown formatting throughout
+✅ Professional tone and publication-ready quality
+✅ Complete with all required sections
+
+## Output
+
+Deliver your complete report as a single, well-formatted markdown document. Do NOT truncate, summarize, or abbreviate. Provide the full, comprehensive, publication-ready report that transforms the research findings into an authoritative resource.
+
+Remember: You're creating a professional document that could be published, presented to stakeholders, or used as authoritative reference material. Make it thorough, insightful, and valuable.
+"""
+
+    def write(report_llm):
+        final_agent = create_deep_agent(
+            model=report_llm,
+            system_prompt=report_generation_instructions,
+        )
+
+        return final_agent.invoke({
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"""Based on the following research findings, generate a comprehensive markdown report:
+
+        RESEARCH FINDINGS:
+        {text_content}
+
+        Generate the complete report now following all the instructions provided in your system prompt."""
+                }
+            ]
+        })
+
+    return final_text(write(make_routed_model(router, "report"))["messages"])
+
+
+# ------------------------------ PIPELINE ------------------------------
+def _in_context(token: CancelToken, fn: Callable, *args):
+    # Worker threads don't inherit context variables, so hand the token over
+    with use_token(token):
+        return fn(*args)
+
+
+def _await(token: CancelToken, futures, poll_interval: float, on_tick: Callable[[], None]):
+    """Yield futures as they finish, checking for cancellation between polls."""
+    pending = set(futures)
+    while pending:
+        token.raise_if_cancelled()
+        done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future
+        on_tick()
+
+
+def _refresh_base(previous_run: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The complete run a new run refreshes, or None when it resumes a partial run from scratch.
+
+    That is `previous_run` itself when it is complete. A refresh that was
+    stopped part way stores the refreshed run's report and findings, which
+    are unpacked so that resuming it patches the same report.
+    """
+    if previous_run["status"] == "complete":
+        return previous_run
+    refresh = previous_run["metadata"].get("refresh")
+    if not refresh:
+        return None
+    return {
+        "id": previous_run["metadata"]["refreshed_from"],
+        "created_at": refresh["since"],
+        "report": previous_run["report"],
+        "findings": previous_run["findings"][:refresh["base_findings"]],
+        "sources": previous_run["sources"][:refresh["base_sources"]],
+    }
+
+
+def run_pipeline(
+    query: str,
+    router: ModelRouter,
+    previous_run: Optional[Dict[str, Any]] = None,
+    on_status: Optional[Callable[[str], None]] = None,
+    on_tick: Optional[Callable[[], None]] = None,
+    on_cancelled: Optional[Callable[[Dict[str, Any]], None]] = None,
+    poll_interval: float = 0.5,
+) -> Dict[str, Any]:
+    """Plan, research and write a report for `query`.
+
+    The run is cancellable through the caller's current cancel token (see
+    `cancellation.use_token`). The calling thread only polls the workers, so
+    `on_tick` runs every `poll_interval` seconds; an exception raised from it
+    (such as Streamlit stopping the script) also cancels the run.
+
+    Args:
+        query: The user's research question.
+        router: Router with "research" and "report" cascades, and optionally a
+            "planner" cascade used to decompose the query. If every planner
+            model fails (or cannot be built, e.g. without an API key) the
+            keyword heuristic plans the run instead.
+        previous_run: Stored run to build on instead of starting over. A
+            complete run is refreshed with only what is new since it ran; a
+            cancelled or failed run is resumed: its plan and findings are
+            reused and only the subtopics it did not finish are researched.
+            Resuming a stopped refresh carries on patching the refreshed report.
+        on_status: Called with a short message as each stage starts.
+        on_tick: Called regularly from the calling thread while workers run.
+        on_cancelled: Called with the partial outcome before a cancellation
+            or failure propagates: the findings gathered so far, and no report,
+            or for a refresh the report being refreshed.
+        poll_interval: Seconds between cancellation checks.
+
+    Returns:
+        A dict with the report (None if the writer returned nothing), the
+        findings texts, the source URLs and run metadata.
+    """
+    config = load_config()
+    notify = on_status or (lambda message: None)
+    tick = on_tick or (lambda: None)
+    token = current_token() or CancelToken()
+    started_at = time.time()
+    results: List[Dict[str, Any]] = []
+    subtopics: List[str] = []
+    agent_subtopics: List[str] = []
+    resuming = previous_run is not None and previous_run["status"] != "complete"
+    done = list(previous_run["metadata"].get("completed_subtopics", [])) if resuming else []
+    base_run = _refresh_base(previous_run) if previous_run is not None else None
+
+    def outcome(report_text: Optional[str], status: str) -> Dict[str, Any]:
+        ordered = sorted(results, key=lambda record: record["agent"])
+        research_texts = [record["text"] for record in ordered if record["text"]]
+        sources = [url for record in ordered for url in record["sources"]]
+        completed = [agent_subtopics[record["agent"] - 1] for record in ordered if record["text"]]
+        # Earlier findings are kept even if this run is stopped, so it can be resumed
+        if previous_run is not None:
+            research_texts = previous_run["findings"] + research_texts
+            sources = previous_run["sources"] + sources
+        metadata = {
+            "status": status,
+            "subtopics": subtopics,
+            "agents": len(subtopics),
+            "agent_stats": [record["stats"] for record in ordered],
+            "duration_s": round(time.time() - started_at, 1),
+            "completed_subtopics": done + completed,
+            "refreshed_from": (base_run or previous_run or {}).get("id"),
+        }
+        if base_run is not None:
+            # Where the refreshed run's findings end, to resume this refresh later
+            metadata["refresh"] = {
+                "since": base_run["created_at"],
+                "base_findings": len(base_run["findings"]),
+                "base_sources": len(base_run["sources"]),
+            }
+        if report_text is None and base_run is not None:
+            report_text = base_run["report"]
+        return {
+            "report": report_text,
+            "findings": research_texts,
+            "sources": list(dict.fromkeys(sources)),
+            "metadata": metadata,
+        }
+
+    executor = ThreadPoolExecutor(max_workers=config.max_agents, thread_name_prefix="research")
+    try:
+        if resuming and previous_run["metadata"].get("subtopics"):
+            subtopics = previous_run["metadata"]["subtopics"]
+        else:
+            notify("Planning research...")
+            # Built per request inside the router, so a missing key falls back to the heuristic
+            planner_llm = make_routed_model(router, "planner") if router.cascades.get("planner") else None
+            subtopics = plan_research(query, llm=planner_llm, max_agents=config.max_agents)
+
+        agent_subtopics = [subtopic for subtopic in subtopics if subtopic not in done]
+        agent_queries = agent_subtopics
+        # Skip the sources already gathered, by the refreshed run and by this one so far
+        search_options = (None, previous_run["sources"]) if previous_run is not None else ()
+        if base_run is not None:
+            search_options = (search_timelimit(started_at - base_run["created_at"]), previous_run["sources"])
+            agent_queries = [incremental_query(subtopic, base_run) for subtopic in agent_subtopics]
+
+        if agent_queries:
+            notify(f"{len(agent_queries)} agent(s) are researching...")
+        tasks = [(i + 1, q, router, *search_options) for i, q in enumerate(agent_queries)]
+        futures = [executor.submit(_in_context, token, run_agent, *task) for task in tasks]
+        for f in _await(token, futures, poll_interval, tick):
+            results.append(f.result())
+
+        research_texts = [record["text"] for record in sorted(results, key=lambda r: r["agent"]) if record["text"]]
+        if base_run is not None:
+            # The patch gets everything found since the refreshed run, including by a stopped refresh
+            research_texts = previous_run["findings"][len(base_run["findings"]):] + research_texts
+        elif resuming:
+            research_texts = previous_run["findings"] + research_texts
+        text_content = "\n\n".join(research_texts)
+
+        notify("Writing the report...")
+        if base_run is not None:
+            writer = executor.submit(_in_context, token, update_report, router, base_run, text_content)
+        else:
+            writer = executor.submit(_in_context, token, write_report, router, text_content)
+        report_text = next(_await(token, [writer], poll_interval, tick)).result()
+    except BaseException as error:
+        # Covers Cancelled, agent failures and the caller being interrupted
+        status = "failed" if isinstance(error, Exception) and not isinstance(error, Cancelled) else "cancelled"
+        token.cancel(f"research run {status}")
+        if on_cancelled is not None:
+            on_cancelled(outcome(None, status))
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return outcome(report_text, "complete")
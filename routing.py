@@ -0,0 +1,436 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from cancellation import Cancelled, CancelToken, attach_cancel_callback, current_token, use_token
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """One entry of a stage's fallback cascade."""
+    provider: str
+    model: str
+    api_key: Optional[str] = field(default=None, repr=False)
+    temperature: float = 0.1
+    options: Tuple[Tuple[str, Any], ...] = ()
+
+    @property
+    def label(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+
+class RoutingError(RuntimeError):
+    """Raised when every model in a stage's cascade has failed."""
+
+    def __init__(self, stage: str, errors: List[Tuple[ModelSpec, BaseException]]):
+        self.stage = stage
+        self.errors = errors
+        details = "; ".join(f"{spec.label}: {err!r}" for spec, err in errors)
+        super().__init__(f"all models failed for stage '{stage}': {details}")
+
+
+# ------------------------------ PROVIDERS ------------------------------
+def build_gemini(spec: ModelSpec):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=spec.model, api_key=spec.api_key, temperature=spec.temperature)
+
+
+def build_groq(spec: ModelSpec):
+    from langchain_groq import ChatGroq
+
+    from clients import http_client
+    return ChatGroq(
+        model=spec.model,
+        api_key=spec.api_key,
+        temperature=spec.temperature,
+        http_client=http_client(),
+    )
+
+
+PROVIDERS: Dict[str, Callable[[ModelSpec], Any]] = {
+    "gemini": build_gemini,
+    "groq": build_groq,
+}
+
+
+# Built models by spec; each keeps its provider client (and connections) alive
+_models: Dict[ModelSpec, Any] = {}
+_models_lock = threading.Lock()
+
+
+def register_provider(name: str, factory: Callable[[ModelSpec], Any]) -> None:
+    """Make a model factory available to `ModelSpec(provider=name, ...)`."""
+    PROVIDERS[name] = factory
+    with _models_lock:
+        for spec in [s for s in _models if s.provider == name]:
+            del _models[spec]
+
+
+def build_model(spec: ModelSpec):
+    """Chat model for `spec`, built once per process and shared between runs.
+
+    Models must not be mutated by callers; `attach_cancel_callback` works on a copy.
+    """
+    with _models_lock:
+        model = _models.get(spec)
+    if model is not None:
+        return model
+    try:
+        factory = PROVIDERS[spec.provider]
+    except KeyError:
+        raise ValueError(f"unknown model provider '{spec.provider}'") from None
+    model = factory(spec)
+    with _models_lock:
+        return _models.setdefault(spec, model)
+
+
+def parse_cascade(value: str, api_keys: Dict[str, List[str]]) -> List[ModelSpec]:
+    """Parse a cascade such as "gemini:gemini-2.0-flash,groq:llama-3.3-70b-versatile".
+
+    A provider with several keys in `api_keys` expands into one entry per key,
+    so a rate-limited key falls back to the next one before switching provider.
+    """
+    specs = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        provider, _, model = item.partition(":")
+        if not model:
+            raise ValueError(f"cascade entry '{item}' must look like provider:model")
+        for key in api_keys.get(provider) or [None]:
+            specs.append(ModelSpec(provider=provider, model=model, api_key=key))
+    return specs
+
+
+# ------------------------------ HEALTH TRACKING ------------------------------
+def percentile(samples, pct: float) -> Optional[float]:
+    """Nearest-rank percentile of `samples`, or None when there are none."""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class ModelStats:
+    """Exponentially weighted latency and error rate for one model."""
+
+    def __init__(self, alpha: float = 0.3, window: int = 200):
+        self.alpha = alpha
+        self.calls = 0
+        self.latency: Optional[float] = None
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.error_rate = 0.0
+        self.last_failure = 0.0
+
+    def record(self, latency: Optional[float], ok: bool) -> None:
+        self.calls += 1
+        if ok and latency is not None:
+            self.latency = latency if self.latency is None else (
+                self.alpha * latency + (1 - self.alpha) * self.latency
+            )
+            self.samples.append(latency)
+        self.error_rate = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * self.error_rate
+        if not ok:
+            self.last_failure = time.monotonic()
+
+
+class HedgeMetrics:
+    """Counters describing how often hedging fires and what it buys."""
+
+    def __init__(self, window: int = 500):
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.saved_seconds = 0.0
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, hedged: bool, hedge_won: bool, saved: float = 0.0) -> None:
+        with self._lock:
+            self.calls += 1
+            self.hedged += hedged
+            self.hedge_wins += hedge_won
+            self.saved_seconds += saved
+            self.latencies.append(latency)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = list(self.latencies)
+            calls = self.calls
+            return {
+                "calls": calls,
+                "hedged": self.hedged,
+                "hedge_rate": self.hedged / calls if calls else 0.0,
+                "hedge_wins": self.hedge_wins,
+                "hedge_win_rate": self.hedge_wins / self.hedged if self.hedged else 0.0,
+                "estimated_seconds_saved": round(self.saved_seconds, 3),
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+            }
+
+
+# ------------------------------ ROUTER ------------------------------
+class ModelRouter:
+    """Routes each pipeline stage to the healthiest model of its cascade.
+
+    Models are tried in cascade order, except that models with a high recent
+    error rate or a latency far above the fastest observed alternative are
+    moved to the back. Failures fall through to the next candidate until the
+    cascade is exhausted.
+
+    Hedging is opt-in: when `hedge` is set, a request still running after the
+    `hedge_percentile` latency of its model (or `hedge_after` seconds until
+    `min_samples` latencies have been observed) is duplicated on the next
+    candidate. The first success wins and the other attempt is cancelled.
+    """
+
+    def __init__(
+        self,
+        cascades: Dict[str, List[ModelSpec]],
+        hedge: bool = False,
+        hedge_after: Optional[float] = None,
+        hedge_percentile: float = 95.0,
+        min_samples: int = 20,
+        poll_interval: float = 0.5,
+        max_error_rate: float = 0.5,
+        error_cooldown: float = 60.0,
+        slow_factor: float = 3.0,
+    ):
+        self.cascades = cascades
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.poll_interval = poll_interval
+        self.max_error_rate = max_error_rate
+        self.error_cooldown = error_cooldown
+        self.slow_factor = slow_factor
+        # Per stage, since a report request takes far longer than a research step
+        self.stats: Dict[Tuple[str, ModelSpec], ModelStats] = {}
+        self.metrics = HedgeMetrics()
+        self._lock = threading.Lock()
+
+    def _stats(self, stage: str, spec: ModelSpec) -> ModelStats:
+        with self._lock:
+            return self.stats.setdefault((stage, spec), ModelStats())
+
+    def record(self, stage: str, spec: ModelSpec, latency: Optional[float], ok: bool) -> None:
+        stats = self._stats(stage, spec)
+        with self._lock:
+            stats.record(latency, ok)
+
+    def candidates(self, stage: str, offset: int = 0) -> List[ModelSpec]:
+        """Return the stage's cascade ordered by health.
+
+        `offset` rotates the leading entries that share the first entry's
+        provider and model (one per API key), which spreads parallel callers
+        of the same stage across keys while everything is healthy. The rest of
+        the cascade keeps its configured order.
+        """
+        cascade = self.cascades.get(stage)
+        if not cascade:
+            raise ValueError(f"no models configured for stage '{stage}'")
+        first = (cascade[0].provider, cascade[0].model)
+        keys = next((i for i, spec in enumerate(cascade) if (spec.provider, spec.model) != first), len(cascade))
+        offset %= keys
+        ordered = cascade[offset:keys] + cascade[:offset] + cascade[keys:]
+
+        now = time.monotonic()
+        stats = {spec: self._stats(stage, spec) for spec in ordered}
+        observed = [s.latency for s in stats.values() if s.latency is not None]
+        fastest = min(observed) if observed else None
+
+        def key(item):
+            index, spec = item
+            s = stats[spec]
+            unhealthy = (
+                s.error_rate > self.max_error_rate
+                and now - s.last_failure < self.error_cooldown
+            )
+            slow = fastest is not None and s.latency is not None and s.latency > self.slow_factor * fastest
+            return (unhealthy, slow, index)
+
+        return [spec for _, spec in sorted(enumerate(ordered), key=key)]
+
+    def hedge_delay(self, stage: str, spec: ModelSpec) -> Optional[float]:
+        """Seconds to wait on `spec` before sending a duplicate request."""
+        if not self.hedge:
+            return None
+        stats = self._stats(stage, spec)
+        with self._lock:
+            samples = list(stats.samples)
+        if len(samples) >= self.min_samples:
+            return percentile(samples, self.hedge_percentile)
+        return self.hedge_after
+
+    def expected_tail(self, stage: str, spec: ModelSpec, delay: float) -> Optional[float]:
+        """Mean observed latency of `spec` among calls slower than `delay`."""
+        stats = self._stats(stage, spec)
+        with self._lock:
+            slow = [s for s in stats.samples if s > delay]
+        return sum(slow) / len(slow) if slow else None
+
+    def _call(self, stage: str, spec: ModelSpec, fn: Callable[[Any], Any], token: CancelToken):
+        start = time.monotonic()
+        try:
+            with use_token(token):
+                token.raise_if_cancelled()
+                result = fn(attach_cancel_callback(build_model(spec), token))
+        except Cancelled:
+            raise
+        except BaseException:
+            if token.cancelled:
+                raise Cancelled(token.reason or "cancelled") from None
+            self.record(stage, spec, None, ok=False)
+            raise
+        self.record(stage, spec, time.monotonic() - start, ok=True)
+        return result
+
+    def run(self, stage: str, fn: Callable[[Any], Any], offset: int = 0):
+        """Call `fn(llm)` with the stage's models until one succeeds.
+
+        Args:
+            stage: Name of the cascade to route through, e.g. "research".
+            fn: Callable receiving a chat model and returning the stage result.
+            offset: Rotation applied to the first model's keys (see `candidates`).
+
+        Returns:
+            The result of the first successful call.
+
+        Raises:
+            Cancelled: The caller's current cancel token fired; all attempts
+                are cancelled before this is raised.
+            RoutingError: Every model in the cascade failed.
+        """
+        queue = self.candidates(stage, offset)
+        errors: List[Tuple[ModelSpec, BaseException]] = []
+        pending = {}
+        parent = current_token()
+        executor = ThreadPoolExecutor(max_workers=len(queue), thread_name_prefix=f"router-{stage}")
+        start = time.monotonic()
+
+        def launch() -> ModelSpec:
+            spec = queue.pop(0)
+            token = parent.child() if parent is not None else CancelToken()
+            pending[executor.submit(self._call, stage, spec, fn, token)] = (spec, token)
+            return spec
+
+        try:
+            primary, primary_start, hedged_at = launch(), start, None
+            while pending:
+                if parent is not None:
+                    parent.raise_if_cancelled()
+                delay = self.hedge_delay(stage, primary) if queue and hedged_at is None else None
+                hedge_at = primary_start + delay if delay is not None else None
+                # With a cancellable caller, wake up regularly to notice cancellation
+                timeout = self.poll_interval if parent is not None else None
+                if hedge_at is not None:
+                    remaining = max(0.0, hedge_at - time.monotonic())
+                    timeout = remaining if timeout is None else min(remaining, timeout)
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    if hedge_at is not None and time.monotonic() >= hedge_at:
+                        # Slow request: hedge with the next model in the cascade
+                        hedged_at = time.monotonic() - primary_start
+                        launch()
+                    continue
+                for future in done:
+                    spec, _ = pending.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        self._record_outcome(stage, start, primary, primary_start, spec, hedged_at)
+                        return future.result()
+                    if isinstance(error, Cancelled) and parent is not None and parent.cancelled:
+                        raise error
+                    errors.append((spec, error))
+                if not pending and queue:
+                    if parent is not None:
+                        parent.raise_if_cancelled()
+                    primary, primary_start, hedged_at = launch(), time.monotonic(), None
+            raise RoutingError(stage, errors)
+        finally:
+            for future, (_, token) in pending.items():
+                token.cancel("run cancelled" if parent is not None and parent.cancelled else "superseded by a faster attempt")
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _record_outcome(
+        self,
+        stage: str,
+        start: float,
+        primary: ModelSpec,
+        primary_start: float,
+        winner: ModelSpec,
+        hedged_at: Optional[float],
+    ) -> None:
+        now = time.monotonic()
+        hedge_won = hedged_at is not None and winner != primary
+        saved = 0.0
+        if hedge_won:
+            # The cancelled primary never reports its latency. Compare against what it
+            # usually takes once it has run this long; with no such calls observed,
+            # count how much sooner the hedge answered than the primary had been running.
+            primary_elapsed = now - primary_start
+            hedge_latency = primary_elapsed - hedged_at
+            tail = self.expected_tail(stage, primary, primary_elapsed)
+            if tail is not None:
+                saved = tail - primary_elapsed
+            else:
+                saved = max(0.0, primary_elapsed - hedge_latency)
+        latency = now - start
+        self.metrics.record(latency, hedged=hedged_at is not None, hedge_won=hedge_won, saved=saved)
+
+
+# ------------------------------ ROUTED CHAT MODEL ------------------------------
+@lru_cache(maxsize=None)
+def _routed_model_class():
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class RoutedChatModel(BaseChatModel):
+        """Chat model that sends every request through `router.run(stage, ...)`."""
+
+        router: Any
+        stage: str
+        offset: int = 0
+        tools: List[Any] = []
+        tool_kwargs: Dict[str, Any] = {}
+
+        @property
+        def _llm_type(self) -> str:
+            return "routed"
+
+        def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+            # Bound per request on whichever model the router picks
+            if tool_choice is not None:
+                kwargs["tool_choice"] = tool_choice
+            return self.model_copy(update={"tools": list(tools), "tool_kwargs": kwargs})
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            def request(llm):
+                if self.tools:
+                    llm = llm.bind_tools(self.tools, **self.tool_kwargs)
+                return llm.invoke(messages, stop=stop, **kwargs)
+
+            message = self.router.run(self.stage, request, offset=self.offset)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    return RoutedChatModel
+
+
+def make_routed_model(router: ModelRouter, stage: str, offset: int = 0):
+    """Chat model for agents that routes, falls back and hedges each request separately.
+
+    Passing this to `create_deep_agent` instead of a concrete model means a slow
+    or failing request is retried or hedged on its own, rather than repeating the
+    agent's whole run (and its searches) on another model.
+    """
+    return _routed_model_class()(router=router, stage=stage, offset=offset)
@@ -0,0 +1,88 @@
+import re
+from typing import List, Tuple
+
+HEADING = re.compile(r"^(#{1,2})\s+(.+?)\s*#*\s*$")
+FENCE = re.compile(r"^\s*(```|~~~)")
+
+# Sections that stay at the end of a report when new sections are appended
+TRAILING_SECTIONS = ("conclusion", "references", "sources", "references and sources")
+
+
+def split_sections(markdown: str) -> List[Tuple[str, str]]:
+    """Split a markdown report into (heading, body) pairs at H1/H2 headings.
+
+    Text before the first heading gets an empty heading. Headings inside
+    fenced code blocks are ignored.
+    """
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    in_fence = False
+    for line in markdown.splitlines():
+        if FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING.match(line)
+        if match:
+            sections.append((line.strip(), []))
+        else:
+            sections[-1][1].append(line)
+
+    result = [(heading, "\n".join(body).strip("\n")) for heading, body in sections]
+    if result and not result[0][0] and not result[0][1].strip():
+        result = result[1:]
+    return result
+
+
+def join_sections(sections: List[Tuple[str, str]]) -> str:
+    parts = []
+    for heading, body in sections:
+        parts.append(f"{heading}\n\n{body}".strip() if heading else body.strip())
+    return "\n\n".join(p for p in parts if p) + "\n"
+
+
+def heading_key(heading: str) -> str:
+    """Normalise a heading for matching: drop hashes, numbering and case."""
+    text = heading.lstrip("#").strip().lower()
+    text = re.sub(r"^[\d.)\s]+", "", text)
+    return re.sub(r"[^\w\s]", "", text).strip()
+
+
+def merge_sections(existing: str, patch: str) -> str:
+    """Apply a patch report to an existing one, section by section.
+
+    Sections of `patch` whose heading matches an existing section replace it
+    in place; unmatched sections are inserted before the trailing
+    conclusion/references sections. Everything else is kept verbatim.
+    """
+    merged = split_sections(existing)
+    index = {heading_key(h): i for i, (h, _) in enumerate(merged) if h}
+
+    for heading, body in split_sections(patch):
+        if not heading:
+            continue
+        key = heading_key(heading)
+        if key in index:
+            merged[index[key]] = (merged[index[key]][0], body)
+            continue
+        insert_at = next(
+            (i for i, (h, _) in enumerate(merged) if heading_key(h) in TRAILING_SECTIONS),
+            len(merged),
+        )
+        merged.insert(insert_at, (heading, body))
+        index = {heading_key(h): i for i, (h, _) in enumerate(merged) if h}
+
+    return join_sections(merged)
+
+
+def section_title(heading: str) -> str:
+    return heading.lstrip("#").strip()
+
+
+def render_sections(markdown: str) -> List[Tuple[str, str]]:
+    """Render each H1/H2 section of a report to HTML, returning (title, html) pairs."""
+    from markdown_it import MarkdownIt
+
+    md = MarkdownIt("commonmark", {"html": False}).enable("table").enable("strikethrough")
+    rendered = []
+    for heading, body in split_sections(markdown):
+        title = section_title(heading) if heading else "Introduction"
+        rendered.append((title, md.render(f"{heading}\n\n{body}" if heading else body)))
+    return rendered
@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+
+from cancellation import (
+    Cancelled,
+    CancelToken,
+    attach_cancel_callback,
+    current_token,
+    raise_if_cancelled,
+    use_token,
+)
+from fakes import FakeChatModel
+
+
+def test_cancelling_a_token_cancels_its_children_only():
+    parent = CancelToken()
+    child = parent.child()
+
+    child.cancel("hedge lost")
+    assert child.cancelled and not parent.cancelled
+
+    other = parent.child()
+    parent.cancel("user stopped")
+    assert other.cancelled
+    with pytest.raises(Cancelled, match="user stopped"):
+        other.raise_if_cancelled()
+
+
+def test_first_cancel_reason_is_kept():
+    token = CancelToken()
+    token.cancel("first")
+    token.cancel("second")
+    assert token.reason == "first"
+
+
+def test_sleep_wakes_up_when_cancelled():
+    token = CancelToken()
+    threading.Timer(0.05, token.cancel).start()
+
+    started = time.monotonic()
+    with pytest.raises(Cancelled):
+        token.sleep(5.0)
+    assert time.monotonic() - started < 1.0
+
+
+def test_use_token_sets_the_current_token_for_the_block():
+    token = CancelToken()
+    raise_if_cancelled()  # no-op outside a cancellable scope
+
+    with use_token(token):
+        assert current_token() is token
+        token.cancel()
+        with pytest.raises(Cancelled):
+            raise_if_cancelled()
+    assert current_token() is None
+
+
+def test_attach_cancel_callback_checks_the_token_on_a_copy():
+    llm = FakeListChatModel(responses=["ok"])
+    token = CancelToken()
+    guarded = attach_cancel_callback(llm, token)
+
+    assert guarded is not llm
+    assert not llm.callbacks
+    assert guarded.invoke("question").content == "ok"
+
+    token.cancel()
+    with pytest.raises(Cancelled):
+        guarded.invoke("question")
+    assert llm.invoke("question").content == "ok"
+
+
+def test_attach_cancel_callback_leaves_models_without_callbacks_unchanged():
+    llm = FakeChatModel()
+    assert attach_cancel_callback(llm, CancelToken()) is llm
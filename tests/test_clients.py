@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from clients import ClientPool
+
+
+class Client:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_released_clients_are_reused():
+    pool = ClientPool(Client, size=2)
+
+    with pool.acquire() as first:
+        pass
+    with pool.acquire() as second:
+        pass
+    assert second is first
+    assert pool.created == 1
+
+
+def test_acquire_never_waits_for_a_busy_pool():
+    pool = ClientPool(Client, size=1)
+    barrier = threading.Barrier(3, timeout=2)
+
+    def use(_):
+        with pool.acquire() as client:
+            barrier.wait()
+            return client
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        clients = list(executor.map(use, range(3)))
+    assert len(set(map(id, clients))) == 3
+    # Only one fits back in the pool; the others are closed
+    assert sum(client.closed for client in clients) == 2
+
+
+def test_client_is_closed_when_its_request_raises():
+    pool = ClientPool(Client, size=2)
+
+    with pytest.raises(RuntimeError):
+        with pool.acquire() as broken:
+            raise RuntimeError("connection reset")
+    assert broken.closed
+    with pool.acquire() as client:
+        assert client is not broken
+
+
+def test_close_closes_idle_clients():
+    pool = ClientPool(Client, size=2)
+    with pool.acquire() as client:
+        pass
+
+    pool.close()
+    assert client.closed
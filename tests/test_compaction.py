@@ -0,0 +1,67 @@
+import json
+from types import SimpleNamespace
+
+from compaction import COMPACTED_MARKER, compact_results, estimate_tokens, plan_compaction
+
+
+def tool(content, call_id):
+    return SimpleNamespace(type="tool", content=content, tool_call_id=call_id)
+
+
+def history(searches, body_words=200):
+    messages = [SimpleNamespace(type="human", content="question")]
+    for i in range(searches):
+        messages.append(SimpleNamespace(type="ai", content=""))
+        results = [{"title": f"Result {i}", "href": f"https://example.com/{i}", "body": "word " * body_words}]
+        messages.append(tool(json.dumps(results), f"call_{i}"))
+    return messages
+
+
+def test_compact_results_trims_bodies_and_drops_repeats():
+    seen = set()
+    results = [
+        {"title": " A ", "href": "https://a.example", "body": "alpha " * 100},
+        {"title": "B", "href": "https://b.example", "body": "beta body"},
+        {"title": "A again", "href": "https://a.example", "body": "other"},
+    ]
+    first = compact_results(results, seen, body_chars=50)
+    assert [r["href"] for r in first] == ["https://a.example", "https://b.example"]
+    assert first[0]["title"] == "A" and len(first[0]["body"]) <= 51
+    assert compact_results([{"href": "https://c.example", "body": "beta body"}], seen) == []
+
+
+def test_history_under_budget_is_left_alone():
+    messages = history(3)
+    total = sum(estimate_tokens(m.content) for m in messages)
+    replacements, offloaded, before, after = plan_compaction(messages, threshold_tokens=total)
+    assert replacements == {} and offloaded == {}
+    assert before == after == total
+
+
+def test_old_tool_outputs_are_offloaded_and_recent_ones_kept():
+    messages = history(6)
+    replacements, offloaded, before, after = plan_compaction(messages, threshold_tokens=600, keep_recent=2)
+    tool_indexes = [i for i, m in enumerate(messages) if m.type == "tool"]
+    assert set(replacements) <= set(tool_indexes[:-2])
+    assert replacements and min(replacements) == tool_indexes[0]
+    assert all(summary.startswith(COMPACTED_MARKER) for summary in replacements.values())
+    assert sorted(offloaded) == sorted(f"/search_results/call_{i // 2 - 1}.json" for i in replacements)
+    assert after < before
+
+
+def test_already_compacted_outputs_are_skipped():
+    messages = history(4)
+    replacements, _, _, _ = plan_compaction(messages, threshold_tokens=0, keep_recent=1)
+    for i, summary in replacements.items():
+        messages[i].content = summary
+    again, _, _, _ = plan_compaction(messages, threshold_tokens=0, keep_recent=1)
+    assert again == {}
+
+
+def test_prompt_and_tool_schemas_count_towards_the_budget():
+    messages = history(4)
+    total = sum(estimate_tokens(m.content) for m in messages)
+    assert plan_compaction(messages, threshold_tokens=total)[0] == {}
+    replacements, _, before, _ = plan_compaction(messages, threshold_tokens=total, base_tokens=1000)
+    assert replacements
+    assert before == total + 1000
@@ -0,0 +1,50 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from findings import final_text, findings_record
+
+
+def test_final_text_joins_text_blocks():
+    messages = [
+        HumanMessage(content="question"),
+        AIMessage(content=[
+            {"type": "reasoning", "reasoning": "thinking"},
+            {"type": "text", "text": "The answer"},
+            {"type": "text", "text": " in two blocks."},
+        ]),
+    ]
+    assert final_text(messages) == "The answer in two blocks."
+
+
+def test_final_text_skips_ai_messages_without_text():
+    messages = [
+        AIMessage(content="Earlier answer."),
+        AIMessage(content="", tool_calls=[{"name": "internet_search", "args": {}, "id": "call_1"}]),
+    ]
+    assert final_text(messages) == "Earlier answer."
+    assert final_text([HumanMessage(content="question")]) is None
+
+
+def test_findings_record_keeps_answer_sources_and_stats():
+    state = {
+        "messages": [
+            HumanMessage(content="question"),
+            AIMessage(content="", tool_calls=[{"name": "internet_search", "args": {}, "id": "call_1"}]),
+            ToolMessage(content='[{"href": "https://a.example/x"}, {"href": "https://b.example"}]', tool_call_id="call_1"),
+            AIMessage(content="Findings."),
+        ],
+        "files": {"/notes.md": "notes"},
+    }
+    record = findings_record(2, "subtopic", state, 1.234, prefill_steps=[(900, 400), (1200, 600)])
+
+    assert record["agent"] == 2
+    assert record["text"] == "Findings."
+    assert record["sources"] == ["https://a.example/x", "https://b.example"]
+    assert record["stats"] == {
+        "duration_s": 1.23,
+        "messages": 4,
+        "searches": 1,
+        "files": 1,
+        "model_calls": 2,
+        "max_prefill_tokens": 1200,
+    }
+    assert record["trace_path"] is None
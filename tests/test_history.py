@@ -0,0 +1,66 @@
+import pytest
+
+from history import HistoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+
+def test_saved_run_round_trips(store):
+    run_id = store.save_run(
+        "What is LangGraph?", "# Report", ["finding"], ["https://a.example"], {"agents": 1}
+    )
+    run = store.get_run(run_id)
+    assert run["query"] == "What is LangGraph?"
+    assert run["status"] == "complete"
+    assert run["findings"] == ["finding"]
+    assert run["sources"] == ["https://a.example"]
+    assert run["metadata"] == {"agents": 1}
+
+
+def test_list_runs_pages_newest_first(store):
+    ids = [store.save_run(f"query {i}", "report") for i in range(5)]
+    page, total = store.list_runs(page=0, page_size=2)
+    assert total == 5
+    assert [run["id"] for run in page] == ids[::-1][:2]
+    assert "report" not in page[0]
+    page, _ = store.list_runs(page=2, page_size=2)
+    assert [run["id"] for run in page] == [ids[0]]
+
+
+def test_search_ranks_query_matches_and_returns_snippets(store):
+    in_report = store.save_run("Battery supply chains", "Lithium prices fell in 2024.")
+    in_query = store.save_run("Lithium mining outlook", "Mining output grew.")
+    store.save_run("Unrelated topic", "Nothing to see.")
+
+    results, total = store.search("lithium")
+    assert total == 2
+    assert [run["id"] for run in results] == [in_query, in_report]
+    assert "**Lithium**" in results[1]["snippet"]
+
+
+def test_deleted_runs_leave_the_search_index(store):
+    run_id = store.save_run("Fusion energy timelines", "report")
+    store.delete_run(run_id)
+    assert store.get_run(run_id) is None
+    assert store.search("fusion") == ([], 0)
+
+
+def test_find_previous_matches_similar_queries_only(store):
+    run_id = store.save_run("State of small modular nuclear reactors", "report")
+    assert store.find_previous("state of small modular nuclear reactors?")["id"] == run_id
+    assert store.find_previous("small modular nuclear reactor costs") is None
+    assert store.find_previous("") is None
+
+
+
+
+
+def test_find_previous_returns_partial_runs_for_resuming(store):
+    store.save_run("Global EV battery market", "old report")
+    partial = store.save_run("Global EV battery market", "", ["finding"], status="cancelled")
+    assert store.find_previous("global EV battery market")["id"] == partial
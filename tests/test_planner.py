@@ -0,0 +1,67 @@
+import pytest
+
+from fakes import FakeChatModel
+from planner import estimate_agent_count, parse_subtopics, plan_research, split_query
+
+
+def test_parse_subtopics_reads_the_json_array_in_a_reply():
+    reply = 'Here you go:\n["market size", "key players", "risks", "regulation", "extra"]'
+    assert parse_subtopics(reply, max_agents=4) == ["market size", "key players", "risks", "regulation"]
+
+
+@pytest.mark.parametrize("reply", ["no list here", "[]", '["", "  "]'])
+def test_parse_subtopics_rejects_replies_without_subtopics(reply):
+    with pytest.raises(ValueError):
+        parse_subtopics(reply)
+
+
+def test_simple_question_gets_one_agent():
+    assert estimate_agent_count("What is LangGraph?") == 1
+    assert split_query("What is LangGraph?", 1) == ["What is LangGraph?"]
+
+
+def test_broad_question_gets_several_agents():
+    query = "Survey the global EV battery market: key players, pricing trends, and supply chain risks"
+    assert 1 < estimate_agent_count(query) <= 4
+    assert estimate_agent_count(query, max_agents=2) == 2
+
+
+def test_compound_phrases_are_not_split():
+    query = "What are the pros and cons of remote work, and how does it affect productivity?"
+    parts = split_query(query, 2)
+    assert parts[0].endswith("focus on: What are the pros and cons of remote work")
+    assert parts[1].endswith("focus on: how does it affect productivity")
+    # The "and" of "pros and cons" is not counted as a second topic
+    assert estimate_agent_count("pros and cons of nuclear power") == estimate_agent_count(
+        "advantages of nuclear power"
+    ) + 1
+
+
+def test_plan_research_uses_the_planner_model():
+    llm = FakeChatModel(reply='["history", "current state"]')
+    assert plan_research("Nuclear power", llm=llm) == [
+        "Nuclear power — focus on: history",
+        "Nuclear power — focus on: current state",
+    ]
+    assert plan_research("Nuclear power", llm=FakeChatModel(reply='["one topic"]')) == ["Nuclear power"]
+
+
+@pytest.mark.parametrize("llm", [FakeChatModel(error_rate=1.0), FakeChatModel(reply="not json")])
+def test_plan_research_falls_back_to_the_heuristic(llm):
+    query = "Compare LangGraph, CrewAI and AutoGen for multi-agent orchestration"
+    assert plan_research(query, llm=llm) == split_query(query, estimate_agent_count(query))
+
+
+def test_comparisons_split_into_one_agent_per_compared_item():
+    query = "Compare LangGraph, CrewAI and AutoGen for multi-agent orchestration"
+    assert [part.split("focus on: ")[1] for part in split_query(query, 3)] == [
+        "LangGraph", "CrewAI", "AutoGen for multi-agent orchestration",
+    ]
+    assert [part.split("focus on: ")[1] for part in split_query("LangGraph vs CrewAI", 2)] == ["LangGraph", "CrewAI"]
+
+
+def test_and_between_two_names_is_not_a_second_topic():
+    assert estimate_agent_count("Tom and Jerry") == 1
+    assert estimate_agent_count("Compare LangGraph, CrewAI and AutoGen") > estimate_agent_count(
+        "Compare LangGraph, CrewAI"
+    )
@@ -0,0 +1,184 @@
+import threading
+import time
+
+import pytest
+
+import research
+from cancellation import Cancelled, CancelToken, use_token
+from fakes import FakeDDGS, FakeDeepAgentFactory, fake_spec, register_fake_provider
+from history import HistoryStore
+from research import run_pipeline, search_timelimit
+from routing import ModelRouter
+
+DAY = 86400
+
+
+class RecordingDDGS(FakeDDGS):
+    timelimits = []
+
+    def text(self, query, max_results=10, **kwargs):
+        RecordingDDGS.timelimits.append(kwargs.get("timelimit"))
+        return super().text(query, max_results, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def fake_backends(monkeypatch):
+    register_fake_provider()
+    RecordingDDGS.timelimits = []
+    monkeypatch.setattr(research, "DDGS", RecordingDDGS)
+    monkeypatch.setattr(research, "create_deep_agent", FakeDeepAgentFactory(steps=(1, 1), seed=0))
+    research.search_pool.cache_clear()
+    yield
+    research.search_pool.cache_clear()
+
+
+def make_router(report="## Overview\nFresh report."):
+    return ModelRouter({
+        "research": [fake_spec("researcher", reply="New findings.")],
+        "report": [fake_spec("writer", reply=report)],
+    })
+
+
+def complete_run(age_seconds):
+    return {
+        "id": 7,
+        "query": "Global EV battery market",
+        "status": "complete",
+        "created_at": time.time() - age_seconds,
+        "report": "# EV batteries\n\n## Overview\nOld overview.\n\n## Outlook\nOld outlook.",
+        "findings": ["Old findings."],
+        "sources": ["https://example.com/old"],
+        "metadata": {"subtopics": ["Global EV battery market"]},
+    }
+
+
+@pytest.mark.parametrize(
+    "days, expected",
+    [
+        (0.5, "d"),
+        (1, "d"),
+        (1.01, "w"),
+        (7, "w"),
+        (8, "m"),
+        (31, "m"),
+        (32, "y"),
+        (365, "y"),
+        (366, None),
+    ],
+)
+def test_search_timelimit_covers_the_time_since_the_last_run(days, expected):
+    assert search_timelimit(days * DAY) == expected
+
+
+def test_refresh_searches_only_since_the_last_run_and_patches_its_report():
+    previous = complete_run(age_seconds=3 * DAY)
+    router = make_router(report="## Outlook\nNew outlook.")
+
+    result = run_pipeline("Global EV battery market", router, previous_run=previous, poll_interval=0.01)
+
+    assert set(RecordingDDGS.timelimits) == {"w"}
+    assert "Old overview." in result["report"]
+    assert "New outlook." in result["report"]
+    assert "Old outlook." not in result["report"]
+    assert result["findings"][0] == "Old findings."
+    assert result["findings"][1:] and set(result["findings"][1:]) == {"New findings."}
+    assert result["sources"][0] == "https://example.com/old"
+    assert result["metadata"]["refreshed_from"] == 7
+
+
+def test_refresh_of_a_run_older_than_a_year_is_not_time_limited():
+    previous = complete_run(age_seconds=400 * DAY)
+
+    run_pipeline("Global EV battery market", make_router(), previous_run=previous, poll_interval=0.01)
+
+    assert RecordingDDGS.timelimits and set(RecordingDDGS.timelimits) == {None}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+
+def run_and_stop_after_first_agent(monkeypatch, store, query, previous_run=None):
+    """Run the pipeline, cancelling it once the first agent has finished, and save the partial run."""
+    run_agent, first_done = research.run_agent, threading.Event()
+    token = CancelToken()
+
+    def stoppable_agent(agent_num, *args):
+        if agent_num == 1:
+            record = run_agent(agent_num, *args)
+            first_done.set()
+            return record
+        first_done.wait(5)
+        time.sleep(0.1)
+        token.cancel("user stopped the run")
+        token.raise_if_cancelled()
+
+    partials = []
+    monkeypatch.setattr(research, "run_agent", stoppable_agent)
+    with use_token(token), pytest.raises(Cancelled):
+        run_pipeline(query, make_router(), previous_run=previous_run,
+                     on_cancelled=partials.append, poll_interval=0.01)
+    monkeypatch.setattr(research, "run_agent", run_agent)
+
+    partial = partials[0]
+    store.save_run(query, partial["report"] or "", partial["findings"], partial["sources"],
+                   partial["metadata"], status=partial["metadata"]["status"])
+    return partial
+
+
+def record_agent_queries(monkeypatch):
+    run_agent, queries = research.run_agent, []
+
+    def recording_agent(agent_num, query, *args):
+        queries.append(query)
+        return run_agent(agent_num, query, *args)
+
+    monkeypatch.setattr(research, "run_agent", recording_agent)
+    return queries
+
+
+def test_cancelled_run_is_resumed_from_its_unfinished_subtopics(monkeypatch, store):
+    query = "Solid-state batteries and sodium-ion batteries for grid storage"
+    partial = run_and_stop_after_first_agent(monkeypatch, store, query)
+    assert partial["report"] is None
+    assert partial["metadata"]["status"] == "cancelled"
+    assert len(partial["metadata"]["completed_subtopics"]) == 1
+
+    queries = record_agent_queries(monkeypatch)
+    previous = store.find_previous(query)
+    result = run_pipeline(query, make_router(), previous_run=previous, poll_interval=0.01)
+
+    assert queries == [partial["metadata"]["subtopics"][1]]
+    assert set(RecordingDDGS.timelimits) == {None}
+    assert result["report"] == "## Overview\nFresh report."
+    assert len(result["findings"]) == 2
+    assert result["metadata"]["completed_subtopics"] == partial["metadata"]["subtopics"]
+
+
+def test_cancelled_refresh_is_resumed_by_patching_the_refreshed_report(monkeypatch, store):
+    base = complete_run(age_seconds=0)
+    base["id"] = store.save_run(base["query"], base["report"], base["findings"], base["sources"], base["metadata"])
+    base = store.get_run(base["id"])
+
+    partial = run_and_stop_after_first_agent(monkeypatch, store, base["query"], previous_run=base)
+    previous = store.find_previous(base["query"])
+    assert previous["status"] == "cancelled"
+    assert previous["report"] == base["report"]
+    assert previous["findings"] == base["findings"] + ["New findings."]
+
+    queries = record_agent_queries(monkeypatch)
+    router = make_router(report="## Outlook\nNew outlook.")
+    result = run_pipeline(base["query"], router, previous_run=previous, poll_interval=0.01)
+
+    # Only the unfinished subtopic is researched, still as a refresh of the base run
+    assert len(queries) == 1
+    assert queries[0].startswith(partial["metadata"]["subtopics"][1])
+    assert "already researched" in queries[0]
+    assert set(RecordingDDGS.timelimits) == {"d"}
+    assert "Old overview." in result["report"]
+    assert "New outlook." in result["report"]
+    assert result["findings"] == base["findings"] + ["New findings.", "New findings."]
+    assert result["metadata"]["refreshed_from"] == base["id"]
@@ -0,0 +1,184 @@
+import threading
+import time
+
+import pytest
+
+from cancellation import Cancelled, CancelToken, use_token
+from fakes import FakeProviderError, fake_spec, register_fake_provider
+from routing import ModelRouter, ModelSpec, RoutingError, make_routed_model, percentile
+
+
+@pytest.fixture(autouse=True)
+def fake_models():
+    # Re-registering drops models cached by earlier tests
+    register_fake_provider()
+
+
+def ask(llm):
+    return llm.invoke("question").content
+
+
+def test_falls_back_to_next_model_on_error():
+    down, up = fake_spec("down", error_rate=1.0), fake_spec("up", reply="ok")
+    router = ModelRouter({"research": [down, up]})
+
+    assert router.run("research", ask) == "ok"
+    assert router.stats[("research", down)].error_rate > 0
+    assert router.stats[("research", up)].calls == 1
+
+
+def test_raises_routing_error_when_every_model_fails():
+    specs = [fake_spec("a", error_rate=1.0), fake_spec("b", error_rate=1.0)]
+    router = ModelRouter({"report": specs})
+
+    with pytest.raises(RoutingError) as info:
+        router.run("report", ask)
+    assert info.value.stage == "report"
+    assert [spec for spec, _ in info.value.errors] == specs
+    assert all(isinstance(error, FakeProviderError) for _, error in info.value.errors)
+
+
+def test_candidates_demote_models_with_high_error_rate():
+    flaky, steady = fake_spec("flaky"), fake_spec("steady")
+    router = ModelRouter({"research": [flaky, steady]})
+    for _ in range(5):
+        router.record("research", flaky, None, ok=False)
+
+    assert router.candidates("research") == [steady, flaky]
+
+
+def test_error_demotion_expires_after_cooldown():
+    flaky, steady = fake_spec("flaky"), fake_spec("steady")
+    router = ModelRouter({"research": [flaky, steady]}, error_cooldown=0.0)
+    for _ in range(5):
+        router.record("research", flaky, None, ok=False)
+
+    assert router.candidates("research") == [flaky, steady]
+
+
+def test_candidates_demote_slow_models():
+    slow, fast = fake_spec("slow"), fake_spec("fast")
+    router = ModelRouter({"research": [slow, fast]})
+    router.record("research", slow, 10.0, ok=True)
+    router.record("research", fast, 1.0, ok=True)
+
+    assert router.candidates("research") == [fast, slow]
+    # Stats are per stage, so another stage keeps the configured order
+    router.cascades["report"] = [slow, fast]
+    assert router.candidates("report") == [slow, fast]
+
+
+def test_offset_rotates_only_the_first_models_keys():
+    key1, key2 = ModelSpec("gemini", "flash", "k1"), ModelSpec("gemini", "flash", "k2")
+    groq = ModelSpec("groq", "llama")
+    router = ModelRouter({"research": [key1, key2, groq]})
+
+    assert router.candidates("research", offset=1) == [key2, key1, groq]
+    assert router.candidates("research", offset=2) == [key1, key2, groq]
+    router.cascades["single"] = [key1, groq]
+    assert router.candidates("single", offset=1) == [key1, groq]
+
+
+def test_slow_request_is_hedged_and_the_hedge_wins():
+    slow, fast = fake_spec("slow", latency=2.0, reply="slow"), fake_spec("fast", reply="fast")
+    router = ModelRouter({"research": [slow, fast]}, hedge=True, hedge_after=0.05)
+
+    started = time.monotonic()
+    assert router.run("research", ask) == "fast"
+    assert time.monotonic() - started < 1.0
+
+    summary = router.metrics.summary()
+    assert summary["hedged"] == 1
+    assert summary["hedge_wins"] == 1
+    # The cancelled primary had been running for at least the hedge delay
+    assert summary["estimated_seconds_saved"] >= 0.05
+
+
+def test_fast_request_is_not_hedged():
+    primary, backup = fake_spec("primary", reply="primary"), fake_spec("backup", reply="backup")
+    router = ModelRouter({"research": [primary, backup]}, hedge=True, hedge_after=1.0)
+
+    assert router.run("research", ask) == "primary"
+    assert router.metrics.summary()["hedged"] == 0
+
+
+def test_losing_attempt_is_cancelled():
+    slow, fast = fake_spec("slow", latency=5.0), fake_spec("fast")
+    router = ModelRouter({"research": [slow, fast]}, hedge=True, hedge_after=0.05)
+    baseline = threading.active_count()
+
+    router.run("research", ask)
+    deadline = time.monotonic() + 1.0
+    while threading.active_count() > baseline and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert threading.active_count() <= baseline
+    # The cancelled attempt is not counted as a failure of the slow model
+    assert router.stats[("research", slow)].error_rate == 0.0
+
+
+def test_hedge_delay_switches_to_observed_percentile():
+    spec = fake_spec("model")
+    router = ModelRouter({"research": [spec]}, hedge=True, hedge_after=30.0, min_samples=20)
+    for latency in range(1, 20):
+        router.record("research", spec, float(latency), ok=True)
+    assert router.hedge_delay("research", spec) == 30.0
+
+    router.record("research", spec, 20.0, ok=True)
+    assert router.hedge_delay("research", spec) == 19.0
+
+
+def test_cancelling_the_callers_token_stops_the_run():
+    router = ModelRouter({"research": [fake_spec("slow", latency=5.0)]}, poll_interval=0.05)
+    token = CancelToken()
+    threading.Timer(0.1, token.cancel).start()
+
+    started = time.monotonic()
+    with use_token(token), pytest.raises(Cancelled):
+        router.run("research", ask)
+    assert time.monotonic() - started < 1.0
+
+
+def test_hedge_win_is_measured_against_the_primarys_slow_calls():
+    slow, fast = fake_spec("slow", latency=2.0), fake_spec("fast")
+    router = ModelRouter({"research": [slow, fast]}, hedge=True, hedge_after=0.05)
+    router.record("research", slow, 2.0, ok=True)
+
+    router.run("research", ask)
+    assert router.metrics.summary()["estimated_seconds_saved"] > 1.0
+
+
+def test_routed_model_routes_each_request():
+    down, up = fake_spec("down", error_rate=1.0), fake_spec("up", reply="ok")
+    router = ModelRouter({"research": [down, up]})
+    llm = make_routed_model(router, "research")
+
+    assert llm.invoke("first").content == "ok"
+    assert llm.invoke("second").content == "ok"
+    assert router.stats[("research", up)].calls == 2
+    assert router.stats[("research", down)].calls == 2
+
+
+def test_routed_model_binds_tools_on_the_chosen_model():
+    router = ModelRouter({"research": [fake_spec("model", reply="ok")]})
+    llm = make_routed_model(router, "research", offset=1)
+    bound = llm.bind_tools([], tool_choice="auto")
+
+    assert bound.tool_kwargs == {"tool_choice": "auto"}
+    assert bound.offset == 1
+    assert llm.tool_kwargs == {}
+    assert bound.invoke("question").content == "ok"
+
+
+@pytest.mark.parametrize(
+    "samples, pct, expected",
+    [
+        (range(1, 21), 95, 19),
+        (range(1, 101), 95, 95),
+        (range(1, 101), 99, 99),
+        (range(1, 101), 50, 50),
+        ([7.0], 99, 7.0),
+        ([], 50, None),
+    ],
+)
+def test_percentile_is_nearest_rank(samples, pct, expected):
+    assert percentile(samples, pct) == expected
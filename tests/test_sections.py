@@ -0,0 +1,64 @@
+from sections import heading_key, merge_sections, render_sections, split_sections
+
+REPORT = """# EV Batteries
+
+Intro text.
+
+## 1. Market Size
+
+Old size.
+
+## Key Players
+
+Old players.
+
+## Conclusion
+
+Wrap-up.
+"""
+
+
+def test_split_sections_ignores_headings_in_code_fences():
+    sections = split_sections("intro\n\n## Real\n\n```\n## not a heading\n```\n")
+    assert [heading for heading, _ in sections] == ["", "## Real"]
+    assert "## not a heading" in sections[1][1]
+
+
+def test_heading_key_ignores_level_numbering_and_case():
+    assert heading_key("## 1. Market Size") == heading_key("### market size")
+
+
+def test_merge_replaces_matching_sections_in_place():
+    merged = merge_sections(REPORT, "## Market Size\n\nNew size.")
+    assert "New size." in merged and "Old size." not in merged
+    assert "## 1. Market Size" in merged
+    assert "Old players." in merged and "Intro text." in merged
+    assert merged.index("## 1. Market Size") < merged.index("## Key Players")
+
+
+def test_merge_inserts_new_sections_before_the_conclusion():
+    merged = merge_sections(REPORT, "## Recent Developments\n\nNews.")
+    assert merged.index("## Key Players") < merged.index("## Recent Developments") < merged.index("## Conclusion")
+
+
+def test_merge_with_empty_patch_keeps_the_report():
+    assert split_sections(merge_sections(REPORT, "")) == split_sections(REPORT)
+
+
+def test_render_sections_gives_one_html_block_per_section():
+    rendered = render_sections("Preamble.\n\n" + REPORT)
+
+    assert [title for title, _ in rendered] == [
+        "Introduction", "EV Batteries", "1. Market Size", "Key Players", "Conclusion",
+    ]
+    assert rendered[0][1] == "<p>Preamble.</p>\n"
+    assert rendered[2][1].startswith("<h2>1. Market Size</h2>")
+    assert "<p>Old size.</p>" in rendered[2][1]
+
+
+def test_render_sections_escapes_raw_html_and_renders_tables():
+    (_, html), = render_sections("## Data\n\n<script>alert(1)</script>\n\n| a | b |\n|---|---|\n| 1 | 2 |")
+
+    assert "<script>" not in html
+    assert "&lt;script&gt;" in html
+    assert "<table>" in html